@@ -1,8 +1,15 @@
 import asyncio
+import functools
 import logging
+import random
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+from cachetools import TTLCache
 
 from config import AppConfig
 from telegram_bot import TelegramBot
@@ -10,6 +17,80 @@ from zabbix_client import ZabbixAPIError, ZabbixClient
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Лимиты отслеживания отправленных алертов
+SENT_ALERTS_MAXSIZE = 100_000
+SENT_ALERTS_TTL = 24 * 3600  # 24 часа
+
+# Максимум одновременных отправок в Telegram (ограничение rate limit)
+MAX_CONCURRENT_SENDS = 8
+
+# Очередь повтора: размер и параметры экспоненциальной задержки
+MAX_RETRY_QUEUE = 1024
+MAX_RETRY_ATTEMPTS = 5
+RETRY_BACKOFF_MAX = 300  # секунд
+RETRY_JITTER = 1.0  # секунд
+
+# Границы адаптивного интервала опроса (секунд)
+MIN_POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 60
+
+# Потоки для блокирующих вызовов Zabbix API
+ZABBIX_EXECUTOR_WORKERS = 4
+
+_SEVERITY_ICONS = {
+    "0": "🔵",  # Not classified
+    "1": "🟦",  # Information
+    "2": "🟡",  # Warning
+    "3": "🟠",  # Average
+    "4": "🔴",  # High
+    "5": "🔥",  # Disaster
+}
+
+_STATUS_TEMPLATE = """
+📊 <b>Статус Zabbix монитора</b>
+
+🔄 <b>Мониторинг:</b> {running}
+⏱ <b>Время работы:</b> {uptime_str}
+
+📡 <b>Подключения:</b>
+- Zabbix: {zabbix_connected}
+- Telegram: {telegram_connected}
+
+📈 <b>Статистика:</b>
+- Всего проверок: {total_checks}
+- Найдено проблем: {problems_found}
+- Алертов отправлено: {alerts_sent}
+- Алертов обновлено: {alerts_updated}
+- Алертов удалено: {alerts_deleted}
+- Ошибок: {errors}
+
+💾 <b>Память:</b> {sent_alerts_count} отслеживаемых алертов
+🔄 <b>Очередь повтора:</b> {failed_alerts_count} в ожидании
+""".strip()
+
+
+def _retry_delay(attempts: int) -> float:
+    """Задержка до следующего повтора: экспоненциальная с джиттером"""
+    return min(RETRY_BACKOFF_MAX, 2.0**attempts) + random.uniform(0, RETRY_JITTER)
+
+
+@dataclass(slots=True)
+class MonitorStats:
+    """Счетчики работы монитора"""
+
+    total_checks: int = 0
+    problems_found: int = 0
+    alerts_sent: int = 0
+    alerts_updated: int = 0
+    alerts_deleted: int = 0
+    errors: int = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        """Возвращает плоскую копию счетчиков (без рекурсивного asdict)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
 
 class AlertMonitor:
     """Монитор алертов Zabbix"""
@@ -26,83 +107,167 @@ class AlertMonitor:
         #   "status": str (problem/acknowledged/resolved),
         #   "resolved_at": float (optional)
         # }
-        self.sent_alerts: Dict[str, Dict[str, Any]] = {}
+        # Записи старше SENT_ALERTS_TTL вытесняются кешем автоматически
+        self.sent_alerts: TTLCache[str, Dict[str, Any]] = TTLCache(
+            maxsize=SENT_ALERTS_MAXSIZE, ttl=SENT_ALERTS_TTL
+        )
         self.last_check_time: int = 0
         self.is_running = False
+        # Событие остановки прерывает ожидание следующей проверки
+        self._stop_event: Optional[asyncio.Event] = None
+
+        # Текущий интервал опроса: сокращается при новых проблемах, растет в тишине
+        self._current_interval: float = config.poll_interval
+        self._min_interval = min(MIN_POLL_INTERVAL, config.poll_interval)
+        self._max_interval = max(MAX_POLL_INTERVAL, config.poll_interval)
+
+        # Пул потоков для синхронного ZabbixClient (создается по требованию).
+        # После остановки мониторинга новый пул не создается; цикл мониторинга
+        # закрывает пул сам, когда завершится начатая итерация
+        self._zbx_executor: Optional[ThreadPoolExecutor] = None
+        self._zbx_closed = False
+        self._loop_active = False
+
+        # Ограничение параллельной обработки новых проблем
+        self._send_sem = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
 
         # Очередь неотправленных алертов (graceful degradation)
-        self.failed_alerts: List[Dict[str, Any]] = []
+        self.failed_alerts: Deque[Dict[str, Any]] = deque(maxlen=MAX_RETRY_QUEUE)
 
         # Статистика
-        self.stats: Dict[str, int] = {
-            "total_checks": 0,
-            "problems_found": 0,
-            "alerts_sent": 0,
-            "alerts_updated": 0,
-            "alerts_deleted": 0,
-            "errors": 0,
-        }
+        self.stats = MonitorStats()
         self.last_error: Optional[str] = None
         self.start_time: Optional[datetime] = None
 
     async def start_monitoring(self):
         """Запускает мониторинг алертов"""
         self.is_running = True
+        self._stop_event = stop_event = asyncio.Event()
         self.start_time = datetime.now()
         self.last_check_time = int(time.time()) - self.config.poll_interval
+        self._zbx_closed = False
+        self._loop_active = True
+
+        logger.info("Запуск мониторинга алертов с интервалом %sс", self.config.poll_interval)
 
-        logger.info(f"Запуск мониторинга алертов с интервалом {self.config.poll_interval}с")
+        try:
+            await self._monitoring_loop(stop_event)
+        finally:
+            self._loop_active = False
+            self._shutdown_zbx_executor()
 
+    async def _monitoring_loop(self, stop_event: asyncio.Event) -> None:
+        """Цикл проверок до вызова stop_monitoring"""
         while self.is_running:
+            # Следующая проверка планируется по монотонным часам, чтобы длительность
+            # обработки и переводы системного времени не сдвигали интервал опроса
+            iteration_started = time.monotonic()
+
             try:
-                await self._check_for_alerts()
-                self.stats["total_checks"] += 1
+                # Новые алерты и повтор неудавшихся независимы - их сетевые
+                # ожидания выполняются параллельно. return_exceptions дожидается
+                # обеих задач: ошибка одной не оставляет другую работать в фоне
+                # параллельно со следующей итерацией
+                new_count, retry_result = await asyncio.gather(
+                    self._check_for_alerts(), self._retry_failed_alerts(), return_exceptions=True
+                )
+                if isinstance(retry_result, BaseException):
+                    if not isinstance(retry_result, Exception):
+                        raise retry_result
+                    self.stats.errors += 1
+                    logger.error("Error retrying failed alerts: %s", retry_result)
+                if isinstance(new_count, BaseException):
+                    raise new_count
+                self.stats.total_checks += 1
+                self._adjust_poll_interval(new_count)
 
                 # Проверяем изменения статуса существующих алертов
                 await self._check_for_status_updates()
 
-                # Попытка отправить неудавшиеся алерты
-                await self._retry_failed_alerts()
-
                 # Очистка resolved алертов (удаление сообщений через заданное время)
                 await self._cleanup_resolved_alerts()
 
             except Exception as e:
-                self.stats["errors"] += 1
+                self.stats.errors += 1
                 self.last_error = str(e)
-                logger.error(f"Error during alert check: {e}")
+                logger.error("Error during alert check: %s", e)
 
                 # Попытка переподключения к Zabbix
                 if isinstance(e, ZabbixAPIError):
                     logger.info("Попытка переподключения к Zabbix...")
                     try:
-                        await asyncio.to_thread(self.zabbix_client.check_connection)
+                        await self._zbx(self.zabbix_client.check_connection)
                     except Exception as reconnect_error:
-                        logger.error(f"Не удалось переподключиться к Zabbix: {reconnect_error}")
+                        logger.error("Не удалось переподключиться к Zabbix: %s", reconnect_error)
 
             # Ждем до следующей проверки
             if self.is_running:
-                await asyncio.sleep(self.config.poll_interval)
+                next_poll_at = iteration_started + self._current_interval
+                try:
+                    await asyncio.wait_for(
+                        stop_event.wait(), timeout=max(0.0, next_poll_at - time.monotonic())
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    def _adjust_poll_interval(self, new_count: int):
+        """Адаптирует интервал опроса к частоте появления новых проблем"""
+        if new_count:
+            self._current_interval = max(self._min_interval, self._current_interval / 2)
+        else:
+            self._current_interval = min(self._max_interval, self._current_interval * 2)
 
     def stop_monitoring(self):
         """Останавливает мониторинг"""
         self.is_running = False
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._zbx_closed = True
+        # Работающий цикл закроет пул после текущей итерации
+        if not self._loop_active:
+            self._shutdown_zbx_executor()
         logger.info("Мониторинг алертов остановлен")
 
-    async def _check_for_alerts(self):
-        """Проверяет новые алерты"""
+    def _shutdown_zbx_executor(self) -> None:
+        """Закрывает пул потоков Zabbix и запрещает создание нового"""
+        self._zbx_closed = True
+        if self._zbx_executor is not None:
+            self._zbx_executor.shutdown(wait=False)
+            self._zbx_executor = None
+
+    async def _zbx(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Выполняет блокирующий вызов ZabbixClient в выделенном пуле потоков"""
+        if self._zbx_executor is None:
+            if self._zbx_closed:
+                raise RuntimeError("Мониторинг остановлен, вызовы Zabbix API недоступны")
+            self._zbx_executor = ThreadPoolExecutor(
+                max_workers=ZABBIX_EXECUTOR_WORKERS, thread_name_prefix="zbx"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._zbx_executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def _check_for_alerts(self) -> int:
+        """Проверяет новые алерты, возвращает количество новых проблем"""
         try:
-            # Получаем только активные (нерешенные) проблемы из Zabbix
-            problems = await asyncio.to_thread(
-                self.zabbix_client.get_problems, 50, only_active=True
+            # Получаем только активные (нерешенные) проблемы, появившиеся после
+            # последней проверки - старые события отсекаются на стороне Zabbix
+            problems = await self._zbx(
+                self.zabbix_client.get_problems,
+                50,
+                only_active=True,
+                time_from=self.last_check_time + 1,
             )
 
             if not problems:
                 logger.debug("В Zabbix не найдено проблем")
-                return
+                return 0
 
-            self.stats["problems_found"] += len(problems)
-            new_problems = []
+            self.stats.problems_found += len(problems)
+            # Новые проблемы по eventid: повторы в ответе Zabbix (флаппинг)
+            # не должны обрабатываться параллельно дважды
+            new_problems: Dict[str, Dict[str, Any]] = {}
 
             for problem in problems:
                 problem_id = problem.get("eventid")
@@ -110,7 +275,7 @@ class AlertMonitor:
                     continue
 
                 # Проверяем, не отправляли ли мы уже этот алерт
-                if problem_id in self.sent_alerts:
+                if problem_id in self.sent_alerts or problem_id in new_problems:
                     continue
 
                 # Проверяем время события (отправляем только новые события)
@@ -118,86 +283,111 @@ class AlertMonitor:
                 if event_time <= self.last_check_time:
                     continue
 
-                new_problems.append(problem)
+                new_problems[problem_id] = problem
 
             if new_problems:
-                logger.info(f"Найдено {len(new_problems)} новых проблем")
+                logger.info("Найдено %s новых проблем", len(new_problems))
 
-                # Обрабатываем новые проблемы
-                for problem in new_problems:
-                    await self._process_problem(problem)
+                # Обрабатываем новые проблемы параллельно
+                results = await asyncio.gather(
+                    *(self._process_problem(problem) for problem in new_problems.values()),
+                    return_exceptions=True,
+                )
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    # Ошибки уже залогированы в _process_problem; необработанные проблемы
+                    # будут повторены на следующей итерации
+                    raise errors[0]
 
             # Обновляем время последней проверки
             self.last_check_time = int(time.time())
 
-            # Очищаем старые алерты из памяти (старше 24 часов)
-            await self._cleanup_old_alerts()
+            return len(new_problems)
 
         except Exception as e:
-            logger.error(f"Error checking for alerts: {e}")
+            logger.error("Error checking for alerts: %s", e)
             raise
 
     async def _process_problem(self, problem: Dict[str, Any]):
         """Обрабатывает отдельную проблему"""
-        try:
-            problem_id_value = problem.get("eventid")
-            if not isinstance(problem_id_value, str):
-                logger.debug("Получена проблема без корректного eventid")
-                return
-            problem_id = problem_id_value
-
-            # Получаем детальную информацию о проблеме
-            problem_details = await asyncio.to_thread(
-                self.zabbix_client.get_problem_details, problem
-            )
-
-            # Применяем фильтры (при необходимости)
-            if not self._should_send_alert(problem_details):
-                logger.debug(f"Алерт {problem_id} отфильтрован")
-                return
-
-            # Отправляем алерт с inline-кнопкой
-            message_id = await self.telegram_bot.send_alert(
-                problem_details, zabbix_url=self.config.zabbix.url
-            )
-
-            if message_id:
-                # Сохраняем информацию об алерте
-                self.sent_alerts[problem_id] = {
-                    "message_id": message_id,
-                    "timestamp": time.time(),
-                    "status": "problem",
-                }
-                self.stats["alerts_sent"] += 1
-                logger.info(f"Алерт {problem_id} успешно отправлен (message_id: {message_id})")
-            else:
-                logger.error(f"Не удалось отправить алерт {problem_id}")
-                # Сохраняем неотправленный алерт для повторной попытки
-                self.failed_alerts.append(
-                    {"problem_details": problem_details, "timestamp": time.time(), "attempts": 1}
+        async with self._send_sem:
+            try:
+                problem_id_value = problem.get("eventid")
+                if not isinstance(problem_id_value, str):
+                    logger.debug("Получена проблема без корректного eventid")
+                    return
+                problem_id = problem_id_value
+
+                # Отсекаем проблему по данным problem.get, не запрашивая детали
+                if self._quick_reject(problem):
+                    logger.debug("Алерт %s отфильтрован", problem_id)
+                    return
+
+                # Получаем детальную информацию о проблеме
+                problem_details = await self._zbx(self.zabbix_client.get_problem_details, problem)
+
+                # Применяем фильтры (при необходимости)
+                if not self._should_send_alert(problem_details):
+                    logger.debug("Алерт %s отфильтрован", problem_id)
+                    return
+
+                # Отправляем алерт с inline-кнопкой
+                message_id = await self.telegram_bot.send_alert(
+                    problem_details, zabbix_url=self.config.zabbix.url
                 )
-                logger.info(f"Алерт {problem_id} добавлен в очередь повтора")
 
-        except Exception as e:
-            logger.error(f"Error processing problem {problem.get('eventid', 'unknown')}: {e}")
-            raise
+                if message_id:
+                    # Сохраняем информацию об алерте
+                    self.sent_alerts[problem_id] = {
+                        "message_id": message_id,
+                        "timestamp": time.time(),
+                        "status": "problem",
+                    }
+                    self.stats.alerts_sent += 1
+                    logger.info(
+                        "Алерт %s успешно отправлен (message_id: %s)", problem_id, message_id
+                    )
+                else:
+                    logger.error("Не удалось отправить алерт %s", problem_id)
+                    # Сохраняем неотправленный алерт для повторной попытки
+                    now = time.time()
+                    self._enqueue_failed_alert(
+                        {
+                            "problem_details": problem_details,
+                            "timestamp": now,
+                            "attempts": 1,
+                            "next_retry_at": now + _retry_delay(1),
+                        }
+                    )
+                    logger.info("Алерт %s добавлен в очередь повтора", problem_id)
 
-    def _should_send_alert(self, problem_details: Dict[str, Any]) -> bool:
-        """Определяет, нужно ли отправлять алерт"""
-        problem = problem_details.get("problem", {})
+            except Exception as e:
+                logger.error(
+                    "Error processing problem %s: %s", problem.get("eventid", "unknown"), e
+                )
+                raise
 
+    def _quick_reject(self, problem: Dict[str, Any]) -> bool:
+        """Проверяет фильтры, для которых достаточно данных из problem.get"""
         # Фильтр по серьезности (настраивается через MIN_SEVERITY)
         severity = int(problem.get("severity", 0))
 
         if severity < self.config.min_severity:
             logger.debug(
-                f"Алерт отфильтрован: серьезность {severity} < мин {self.config.min_severity}"
+                "Алерт отфильтрован: серьезность %s < мин %s", severity, self.config.min_severity
             )
-            return False
+            return True
 
         # Фильтр по статусу (только активные проблемы)
         if problem.get("r_eventid", "0") != "0":
-            return False  # Проблема уже решена
+            return True  # Проблема уже решена
+
+        return False
+
+    def _should_send_alert(self, problem_details: Dict[str, Any]) -> bool:
+        """Определяет, нужно ли отправлять алерт"""
+        if self._quick_reject(problem_details.get("problem", {})):
+            return False
 
         # Можно добавить дополнительные фильтры:
         # - по тегам
@@ -219,9 +409,7 @@ class AlertMonitor:
                 return
 
             # Получаем текущий статус всех отслеживаемых событий (включая решенные)
-            problems = await asyncio.to_thread(
-                self.zabbix_client.get_problems, 1000, only_active=False
-            )
+            problems = await self._zbx(self.zabbix_client.get_problems, 1000, only_active=False)
 
             # Создаем словарь текущих проблем по event_id
             current_problems = {p.get("eventid"): p for p in problems if p.get("eventid")}
@@ -239,7 +427,7 @@ class AlertMonitor:
                     problem = current_problems[event_id]
 
                     # Получаем детальную информацию
-                    problem_details = await asyncio.to_thread(
+                    problem_details = await self._zbx(
                         self.zabbix_client.get_problem_details, problem
                     )
 
@@ -257,7 +445,7 @@ class AlertMonitor:
                     # Обновляем сообщение, если статус изменился
                     if new_status != old_status:
                         logger.info(
-                            f"Статус алерта {event_id} изменен: {old_status} -> {new_status}"
+                            "Статус алерта %s изменен: %s -> %s", event_id, old_status, new_status
                         )
 
                         success = await self.telegram_bot.update_alert(
@@ -268,22 +456,22 @@ class AlertMonitor:
                             alert_info["status"] = new_status
                             if new_status == "resolved":
                                 alert_info["resolved_at"] = time.time()
-                            self.stats["alerts_updated"] += 1
-                            logger.info(f"Алерт {event_id} успешно обновлен")
+                            self.stats.alerts_updated += 1
+                            logger.info("Алерт %s успешно обновлен", event_id)
                         else:
-                            logger.error(f"Не удалось обновить алерт {event_id}")
+                            logger.error("Не удалось обновить алерт %s", event_id)
 
                 else:
                     # Проблема не найдена в текущем списке - скорее всего resolved
                     if old_status != "resolved":
-                        logger.info(f"Алерт {event_id} похоже решен (не в активных проблемах)")
+                        logger.info("Алерт %s похоже решен (не в активных проблемах)", event_id)
                         # Можно попробовать получить информацию из resolved events
                         # Пока просто помечаем как resolved
                         alert_info["status"] = "resolved"
                         alert_info["resolved_at"] = time.time()
 
         except Exception as e:
-            logger.error(f"Error checking status updates: {e}")
+            logger.error("Error checking status updates: %s", e)
 
     async def _cleanup_resolved_alerts(self):
         """Удаляет resolved алерты через настроенное время"""
@@ -294,7 +482,7 @@ class AlertMonitor:
             current_time = time.time()
             to_delete = []
 
-            for event_id, alert_info in self.sent_alerts.items():
+            for event_id, alert_info in list(self.sent_alerts.items()):
                 if alert_info.get("status") == "resolved" and alert_info.get("resolved_at"):
                     resolved_at = alert_info["resolved_at"]
                     time_since_resolved = current_time - resolved_at
@@ -303,66 +491,71 @@ class AlertMonitor:
                         message_id = alert_info.get("message_id")
                         if message_id:
                             logger.info(
-                                f"Удаление решенного алерта {event_id} (решен {int(time_since_resolved)}с назад)"
+                                "Удаление решенного алерта %s (решен %sс назад)",
+                                event_id,
+                                int(time_since_resolved),
                             )
 
                             if self.config.mark_resolved:
                                 # Просто оставляем сообщение с пометкой RESOLVED, не удаляем
                                 logger.debug(
-                                    f"Алерт {event_id} помечен как решенный, не удаляется (MARK_RESOLVED=true)"
+                                    "Алерт %s помечен как решенный, не удаляется (MARK_RESOLVED=true)",
+                                    event_id,
                                 )
                             else:
                                 # Удаляем сообщение
                                 success = await self.telegram_bot.delete_message(message_id)
                                 if success:
                                     to_delete.append(event_id)
-                                    self.stats["alerts_deleted"] += 1
-                                    logger.info(f"Алерт {event_id} успешно удален")
+                                    self.stats.alerts_deleted += 1
+                                    logger.info("Алерт %s успешно удален", event_id)
                                 else:
-                                    logger.error(f"Не удалось удалить алерт {event_id}")
+                                    logger.error("Не удалось удалить алерт %s", event_id)
 
             # Удаляем из отслеживания
             for event_id in to_delete:
-                del self.sent_alerts[event_id]
+                self.sent_alerts.pop(event_id, None)
 
             if to_delete:
-                logger.info(f"Удалено {len(to_delete)} решенных алертов")
+                logger.info("Удалено %s решенных алертов", len(to_delete))
 
         except Exception as e:
-            logger.error(f"Error cleaning up resolved alerts: {e}")
-
-    async def _cleanup_old_alerts(self):
-        """Очищает старые алерты из памяти"""
-        if len(self.sent_alerts) > 1000:  # Лимит для предотвращения роста памяти
-            try:
-                current_time = time.time()
-                old_threshold = current_time - (24 * 3600)  # 24 часа
-
-                # Очищаем алерты старше 24 часов
-                old_alerts = [
-                    event_id
-                    for event_id, alert_info in self.sent_alerts.items()
-                    if alert_info.get("timestamp", 0) < old_threshold
-                ]
-
-                for event_id in old_alerts:
-                    del self.sent_alerts[event_id]
-
-                if old_alerts:
-                    logger.debug(f"Очищено {len(old_alerts)} старых алертов из памяти")
-
-            except Exception as e:
-                logger.error(f"Error during cleanup: {e}")
+            logger.error("Error cleaning up resolved alerts: %s", e)
+
+    def _enqueue_failed_alert(self, alert_info: Dict[str, Any]) -> None:
+        """Добавляет алерт в очередь повтора, предупреждая о вытеснении старейшего"""
+        if len(self.failed_alerts) == MAX_RETRY_QUEUE:
+            dropped = self.failed_alerts[0]
+            logger.warning(
+                "Очередь повтора заполнена (%s), отбрасывается алерт %s",
+                MAX_RETRY_QUEUE,
+                dropped["problem_details"].get("problem", {}).get("eventid", "unknown"),
+            )
+        self.failed_alerts.append(alert_info)
 
-    async def _retry_failed_alerts(self):
+    async def _retry_failed_alerts(self) -> None:
         """Повторная попытка отправки неудавшихся алертов"""
         if not self.failed_alerts:
             return
 
-        logger.info(f"Повторная попытка отправки {len(self.failed_alerts)} неудавшихся алертов...")
-        still_failed = []
+        now = time.time()
+        due_count = sum(1 for info in self.failed_alerts if info.get("next_retry_at", 0) <= now)
+        if not due_count:
+            return
+
+        logger.info("Повторная попытка отправки %s неудавшихся алертов...", due_count)
+
+        # Один проход по очереди: алерты, время повтора которых не наступило,
+        # возвращаются в конец без отправки
+        for _ in range(len(self.failed_alerts)):
+            # Очередь могла опустеть за время ожидания отправки
+            if not self.failed_alerts:
+                break
+            alert_info = self.failed_alerts.popleft()
+            if alert_info.get("next_retry_at", 0) > now:
+                self._enqueue_failed_alert(alert_info)
+                continue
 
-        for alert_info in self.failed_alerts:
             problem_details = alert_info["problem_details"]
             attempts = alert_info["attempts"]
             problem_id = problem_details.get("problem", {}).get("eventid")
@@ -370,10 +563,9 @@ class AlertMonitor:
                 logger.debug("Пропуск повторной отправки: отсутствует корректный eventid")
                 continue
 
-            # Максимум 5 попыток
-            if attempts >= 5:
+            if attempts >= MAX_RETRY_ATTEMPTS:
                 logger.warning(
-                    f"Алерт {problem_id} превысил максимальное количество попыток, отбрасывается"
+                    "Алерт %s превысил максимальное количество попыток, отбрасывается", problem_id
                 )
                 continue
 
@@ -381,25 +573,30 @@ class AlertMonitor:
                 problem_details, zabbix_url=self.config.zabbix.url
             )
 
+            # Отправка могла занять время (паузы RetryAfter), поэтому время
+            # берется заново, а не из начала прохода
+            sent_at = time.time()
             if message_id:
                 self.sent_alerts[problem_id] = {
                     "message_id": message_id,
-                    "timestamp": time.time(),
+                    "timestamp": sent_at,
                     "status": "problem",
                 }
-                self.stats["alerts_sent"] += 1
-                logger.info(f"Алерт {problem_id} успешно отправлен при повторе #{attempts}")
+                self.stats.alerts_sent += 1
+                logger.info("Алерт %s успешно отправлен при повторе #%s", problem_id, attempts)
             else:
                 alert_info["attempts"] += 1
-                still_failed.append(alert_info)
-                logger.debug(f"Алерт {problem_id} все еще не отправлен (попытка #{attempts + 1})")
+                alert_info["next_retry_at"] = sent_at + _retry_delay(alert_info["attempts"])
+                self._enqueue_failed_alert(alert_info)
+                logger.debug(
+                    "Алерт %s все еще не отправлен (попытка #%s)", problem_id, attempts + 1
+                )
 
-        self.failed_alerts = still_failed
-        logger.debug(f"{len(self.failed_alerts)} алертов все еще в очереди повтора")
+        logger.debug("%s алертов все еще в очереди повтора", len(self.failed_alerts))
 
     async def get_status(self) -> Dict[str, Any]:
         """Возвращает статус мониторинга"""
-        stats_snapshot: Dict[str, Any] = {**self.stats, "last_error": self.last_error}
+        stats_snapshot: Dict[str, Any] = {**self.stats.snapshot(), "last_error": self.last_error}
 
         status: Dict[str, Any] = {
             "running": self.is_running,
@@ -423,10 +620,10 @@ class AlertMonitor:
         # Проверяем подключения
         try:
             # Простая проверка через API call без auth
-            await asyncio.to_thread(self.zabbix_client._make_request, "apiinfo.version", {}, True)
+            await self._zbx(self.zabbix_client._make_request, "apiinfo.version", {}, True)
             status["zabbix_connected"] = True
         except Exception as e:
-            logger.debug(f"Zabbix connection check failed: {e}")
+            logger.debug("Zabbix connection check failed: %s", e)
             status["zabbix_connected"] = False
 
         try:
@@ -442,44 +639,39 @@ class AlertMonitor:
         try:
             status = await self.get_status()
 
-            message = f"""
-📊 <b>Статус Zabbix монитора</b>
-
-🔄 <b>Мониторинг:</b> {"✅ Работает" if status["running"] else "❌ Остановлен"}
-⏱ <b>Время работы:</b> {status.get("uptime_str", "N/A")}
-
-📡 <b>Подключения:</b>
-- Zabbix: {"✅" if status["zabbix_connected"] else "❌"}
-- Telegram: {"✅" if status["telegram_connected"] else "❌"}
+            stats = status["stats"]
+
+            message = _STATUS_TEMPLATE.format_map(
+                {
+                    "running": "✅ Работает" if status["running"] else "❌ Остановлен",
+                    "uptime_str": status.get("uptime_str", "N/A"),
+                    "zabbix_connected": "✅" if status["zabbix_connected"] else "❌",
+                    "telegram_connected": "✅" if status["telegram_connected"] else "❌",
+                    "total_checks": stats["total_checks"],
+                    "problems_found": stats["problems_found"],
+                    "alerts_sent": stats["alerts_sent"],
+                    "alerts_updated": stats.get("alerts_updated", 0),
+                    "alerts_deleted": stats.get("alerts_deleted", 0),
+                    "errors": stats["errors"],
+                    "sent_alerts_count": status["sent_alerts_count"],
+                    "failed_alerts_count": status["failed_alerts_count"],
+                }
+            )
 
-📈 <b>Статистика:</b>
-- Всего проверок: {status["stats"]["total_checks"]}
-- Найдено проблем: {status["stats"]["problems_found"]}
-- Алертов отправлено: {status["stats"]["alerts_sent"]}
-- Алертов обновлено: {status["stats"].get("alerts_updated", 0)}
-- Алертов удалено: {status["stats"].get("alerts_deleted", 0)}
-- Ошибок: {status["stats"]["errors"]}
-
-💾 <b>Память:</b> {status["sent_alerts_count"]} отслеживаемых алертов
-🔄 <b>Очередь повтора:</b> {status["failed_alerts_count"]} в ожидании
-            """.strip()
-
-            last_error = status["stats"].get("last_error")
+            last_error = stats.get("last_error")
             if last_error:
                 message += f"\n\n❌ <b>Последняя ошибка:</b> {last_error}"
 
             await self.telegram_bot.send_message(message)
 
         except Exception as e:
-            logger.error(f"Failed to send status message: {e}")
+            logger.error("Failed to send status message: %s", e)
 
     async def send_problems_list(self):
         """Отправляет список активных проблем в Telegram"""
         try:
             # Получаем только активные (нерешенные) проблемы
-            all_problems = await asyncio.to_thread(
-                self.zabbix_client.get_problems, 50, only_active=True
-            )
+            all_problems = await self._zbx(self.zabbix_client.get_problems, 50, only_active=True)
 
             # Дополнительная фильтрация на случай, если API вернул решенные проблемы
             problems = [p for p in all_problems if p.get("r_eventid", "0") == "0"]
@@ -487,25 +679,21 @@ class AlertMonitor:
             if not problems:
                 message = "✅ <b>Активных проблем не найдено</b>"
             else:
-                message = f"🚨 <b>Активные проблемы ({len(problems)}):</b>\n\n"
-
-                for index, problem in enumerate(problems[:10], 1):  # Показываем максимум 10
-                    severity_icons = {
-                        "0": "🔵",  # Not classified
-                        "1": "🟦",  # Information
-                        "2": "🟡",  # Warning
-                        "3": "🟠",  # Average
-                        "4": "🔴",  # High
-                        "5": "🔥",  # Disaster
-                    }
+                parts = [f"🚨 <b>Активные проблемы ({len(problems)}):</b>\n\n"]
 
+                shown_problems = problems[:10]  # Показываем максимум 10
+
+                # Получаем детали всех показываемых проблем одним пакетом
+                details_list = await self._zbx(
+                    self.zabbix_client.get_problem_details_batch, shown_problems
+                )
+
+                for index, (problem, details) in enumerate(
+                    zip(shown_problems, details_list, strict=True), 1
+                ):
                     severity = problem.get("severity", "0")
-                    icon = severity_icons.get(severity, "❗")
+                    icon = _SEVERITY_ICONS.get(severity, "❗")
 
-                    # Получаем детали проблемы
-                    details = await asyncio.to_thread(
-                        self.zabbix_client.get_problem_details, problem
-                    )
                     hosts = details.get("hosts", [])
                     host_name = hosts[0].get("name", "Unknown") if hosts else "Unknown"
 
@@ -517,15 +705,17 @@ class AlertMonitor:
                     except (TypeError, ValueError):
                         time_str = "Unknown"
 
-                    message += f"{index}. {icon} <b>{problem.get('name', 'Unknown')}</b>\n"
-                    message += f"   📍 Хост: {host_name}\n"
-                    message += f"   ⏰ Время: {time_str}\n\n"
+                    parts.append(f"{index}. {icon} <b>{problem.get('name', 'Unknown')}</b>\n")
+                    parts.append(f"   📍 Хост: {host_name}\n")
+                    parts.append(f"   ⏰ Время: {time_str}\n\n")
 
                 if len(problems) > 10:
-                    message += f"... и еще {len(problems) - 10} проблем"
+                    parts.append(f"... и еще {len(problems) - 10} проблем")
+
+                message = "".join(parts)
 
             await self.telegram_bot.send_message(message)
 
         except Exception as e:
-            logger.error(f"Failed to send problems list: {e}")
+            logger.error("Failed to send problems list: %s", e)
             await self.telegram_bot.send_message("❌ Ошибка при получении списка проблем")
@@ -1,10 +1,46 @@
+from __future__ import annotations
+
 import os
 from dataclasses import dataclass
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
-
-@dataclass
+# Допустимые схемы ZABBIX_URL
+_URL_SCHEMES = frozenset({"http", "https"})
+
+# Допустимые значения LOG_LEVEL (порядок сохраняется для текста ошибки)
+_LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+_VALID_LOG_LEVELS = frozenset(_LOG_LEVELS)
+
+# Целочисленные параметры: (переменная, значение по умолчанию, минимум, максимум, ошибка)
+_INT_VARS = (
+    ("POLL_INTERVAL", "60", 1, None, "должен быть больше 0"),
+    ("MAX_RETRIES", "3", 0, None, "не может быть отрицательным"),
+    ("RETRY_DELAY", "5", 0, None, "не может быть отрицательным"),
+    ("MIN_SEVERITY", "2", 0, 5, "должен быть в диапазоне 0-5"),
+    ("DELETE_RESOLVED_AFTER", "3600", 0, None, "не может быть отрицательным"),
+    ("QUIET_HOURS_MIN_SEVERITY", "4", 0, 5, "должен быть в диапазоне 0-5"),
+)
+
+# Webhook сервер по умолчанию слушает все интерфейсы: бот работает в контейнере,
+# и Telegram (или reverse proxy) достучится до него только через опубликованный порт.
+# Вне контейнера адрес сужается через TELEGRAM_WEBHOOK_LISTEN
+_DEFAULT_WEBHOOK_LISTEN = "0.0.0.0"  # nosec B104 - нужен для доступа к контейнеру
+
+# Порт webhook проверяется только при заданном TELEGRAM_WEBHOOK_URL, чтобы
+# оставшееся значение не мешало запуску в режиме long polling
+_DEFAULT_WEBHOOK_PORT = 8443
+_WEBHOOK_PORT_VAR = (
+    "TELEGRAM_WEBHOOK_PORT",
+    str(_DEFAULT_WEBHOOK_PORT),
+    1,
+    65535,
+    "должен быть в диапазоне 1-65535",
+)
+
+
+@dataclass(slots=True, frozen=True)
 class ZabbixConfig:
     url: str
     username: Optional[str] = None
@@ -14,14 +50,19 @@ class ZabbixConfig:
     ssl_cert_path: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TelegramConfig:
     bot_token: str
     target_chat_id: int
     parse_mode: str = "HTML"
+    # Webhook вместо long polling (включается заданием webhook_url)
+    webhook_url: Optional[str] = None
+    webhook_listen: str = _DEFAULT_WEBHOOK_LISTEN
+    webhook_port: int = _DEFAULT_WEBHOOK_PORT
+    webhook_secret_token: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AppConfig:
     zabbix: ZabbixConfig
     telegram: TelegramConfig
@@ -45,8 +86,35 @@ class AppConfig:
     quiet_hours_min_severity: int = 4
 
 
+def _parse_int(
+    env: Dict[str, str], name: str, default: str, minimum: int, maximum: Optional[int], error: str
+) -> int:
+    """Читает целочисленную переменную окружения и проверяет диапазон"""
+    try:
+        value = int(env.get(name, default))
+        if value < minimum or (maximum is not None and value > maximum):
+            raise ValueError(f"{name} {error}")
+    except ValueError as e:
+        raise ValueError(f"Некорректное значение {name}: {e}") from e
+    return value
+
+
+def _split_csv(value: str) -> Optional[List[str]]:
+    """Разбирает список через запятую, пустой список возвращается как None"""
+    return [item for item in map(str.strip, value.split(",")) if item] or None
+
+
+@lru_cache(maxsize=1)
 def get_config() -> AppConfig:
-    """Получает конфигурацию из переменных окружения"""
+    """Получает конфигурацию из переменных окружения
+
+    Окружение не меняется за время жизни процесса, поэтому результат кэшируется;
+    get_config.cache_clear() сбрасывает кэш (например, в тестах).
+    """
+
+    # Один снимок окружения: все значения читаются из обычного словаря
+    # и согласованы между собой
+    env = dict(os.environ)
 
     # Обязательные параметры
     required_vars = {
@@ -57,7 +125,7 @@ def get_config() -> AppConfig:
 
     missing_vars = []
     for var, description in required_vars.items():
-        if not os.getenv(var):
+        if not env.get(var):
             missing_vars.append(f"{var} ({description})")
 
     if missing_vars:
@@ -67,22 +135,26 @@ def get_config() -> AppConfig:
         )
 
     # Валидация URL
-    zabbix_url = os.getenv("ZABBIX_URL")
+    zabbix_url = env.get("ZABBIX_URL")
     if zabbix_url is None:
         raise ValueError("Переменная окружения ZABBIX_URL не должна быть пустой")
-    try:
-        parsed_url = urlparse(zabbix_url)
-        if not all([parsed_url.scheme, parsed_url.netloc]):
-            raise ValueError(f"Некорректный формат ZABBIX_URL: {zabbix_url}")
-        if parsed_url.scheme not in ["http", "https"]:
-            raise ValueError("ZABBIX_URL должен начинаться с http:// или https://")
-    except Exception as e:
-        raise ValueError(f"Ошибка валидации ZABBIX_URL: {e}") from e
+    # Быстрый путь: http(s)://<хост>... проверяется без urlparse,
+    # полный разбор нужен только для диагностики некорректного URL
+    scheme, separator, rest = zabbix_url.partition("://")
+    if not (separator and scheme.lower() in _URL_SCHEMES and rest[:1] not in ("", "/", "?", "#")):
+        try:
+            parsed_url = urlparse(zabbix_url)
+            if not all([parsed_url.scheme, parsed_url.netloc]):
+                raise ValueError(f"Некорректный формат ZABBIX_URL: {zabbix_url}")
+            if parsed_url.scheme not in _URL_SCHEMES:
+                raise ValueError("ZABBIX_URL должен начинаться с http:// или https://")
+        except Exception as e:
+            raise ValueError(f"Ошибка валидации ZABBIX_URL: {e}") from e
 
     # Проверяем аутентификацию Zabbix
-    api_token = os.getenv("ZABBIX_API_TOKEN")
-    username = os.getenv("ZABBIX_USERNAME")
-    password = os.getenv("ZABBIX_PASSWORD")
+    api_token = env.get("ZABBIX_API_TOKEN")
+    username = env.get("ZABBIX_USERNAME")
+    password = env.get("ZABBIX_PASSWORD")
 
     if not api_token and not (username and password):
         raise ValueError(
@@ -90,40 +162,10 @@ def get_config() -> AppConfig:
         )
 
     # Валидация численных параметров
-    poll_interval_str = os.getenv("POLL_INTERVAL", "60")
-    try:
-        poll_interval = int(poll_interval_str)
-        if poll_interval <= 0:
-            raise ValueError("POLL_INTERVAL должен быть больше 0")
-    except ValueError as e:
-        raise ValueError(f"Некорректное значение POLL_INTERVAL: {e}") from e
-
-    max_retries_str = os.getenv("MAX_RETRIES", "3")
-    try:
-        max_retries = int(max_retries_str)
-        if max_retries < 0:
-            raise ValueError("MAX_RETRIES не может быть отрицательным")
-    except ValueError as e:
-        raise ValueError(f"Некорректное значение MAX_RETRIES: {e}") from e
-
-    retry_delay_str = os.getenv("RETRY_DELAY", "5")
-    try:
-        retry_delay = int(retry_delay_str)
-        if retry_delay < 0:
-            raise ValueError("RETRY_DELAY не может быть отрицательным")
-    except ValueError as e:
-        raise ValueError(f"Некорректное значение RETRY_DELAY: {e}") from e
-
-    min_severity_str = os.getenv("MIN_SEVERITY", "2")
-    try:
-        min_severity = int(min_severity_str)
-        if not 0 <= min_severity <= 5:
-            raise ValueError("MIN_SEVERITY должен быть в диапазоне 0-5")
-    except ValueError as e:
-        raise ValueError(f"Некорректное значение MIN_SEVERITY: {e}") from e
+    int_values = {spec[0]: _parse_int(env, *spec) for spec in _INT_VARS}
 
     # Валидация chat_id
-    chat_id_str = os.getenv("TELEGRAM_CHAT_ID")
+    chat_id_str = env.get("TELEGRAM_CHAT_ID")
     if chat_id_str is None:
         raise ValueError("TELEGRAM_CHAT_ID не может быть пустым")
     try:
@@ -132,83 +174,69 @@ def get_config() -> AppConfig:
         raise ValueError("TELEGRAM_CHAT_ID должен быть числом") from exc
 
     # Валидация log level
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-    valid_log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
-    if log_level not in valid_log_levels:
-        raise ValueError(f"LOG_LEVEL должен быть одним из: {', '.join(valid_log_levels)}")
+    log_level = env.get("LOG_LEVEL", "INFO").upper()
+    if log_level not in _VALID_LOG_LEVELS:
+        raise ValueError(f"LOG_LEVEL должен быть одним из: {', '.join(_LOG_LEVELS)}")
 
     zabbix_config = ZabbixConfig(
         url=zabbix_url,
         username=username,
         password=password,
         api_token=api_token,
-        ssl_verify=os.getenv("ZABBIX_SSL_VERIFY", "true").lower() == "true",
-        ssl_cert_path=os.getenv("ZABBIX_SSL_CERT_PATH"),
+        ssl_verify=env.get("ZABBIX_SSL_VERIFY", "true").lower() == "true",
+        ssl_cert_path=env.get("ZABBIX_SSL_CERT_PATH"),
     )
 
-    telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
+    telegram_bot_token = env.get("TELEGRAM_BOT_TOKEN")
     if telegram_bot_token is None:
         raise ValueError("TELEGRAM_BOT_TOKEN не может быть пустым")
 
+    # Telegram принимает webhook только по HTTPS
+    webhook_url = env.get("TELEGRAM_WEBHOOK_URL") or None
+    if webhook_url is not None and not webhook_url.startswith("https://"):
+        raise ValueError("TELEGRAM_WEBHOOK_URL должен начинаться с https://")
+    webhook_port = (
+        _parse_int(env, *_WEBHOOK_PORT_VAR) if webhook_url is not None else _DEFAULT_WEBHOOK_PORT
+    )
+
     telegram_config = TelegramConfig(
         bot_token=telegram_bot_token,
         target_chat_id=chat_id,
-        parse_mode=os.getenv("TELEGRAM_PARSE_MODE", "HTML"),
+        parse_mode=env.get("TELEGRAM_PARSE_MODE", "HTML"),
+        webhook_url=webhook_url,
+        webhook_listen=env.get("TELEGRAM_WEBHOOK_LISTEN", _DEFAULT_WEBHOOK_LISTEN),
+        webhook_port=webhook_port,
+        webhook_secret_token=env.get("TELEGRAM_WEBHOOK_SECRET") or None,
     )
 
     # Параметры UX улучшений
-    edit_on_update = os.getenv("EDIT_ON_UPDATE", "true").lower() == "true"
-    mark_resolved = os.getenv("MARK_RESOLVED", "true").lower() == "true"
-
-    delete_resolved_after_str = os.getenv("DELETE_RESOLVED_AFTER", "3600")
-    try:
-        delete_resolved_after = int(delete_resolved_after_str)
-        if delete_resolved_after < 0:
-            raise ValueError("DELETE_RESOLVED_AFTER не может быть отрицательным")
-    except ValueError as e:
-        raise ValueError(f"Некорректное значение DELETE_RESOLVED_AFTER: {e}") from e
+    edit_on_update = env.get("EDIT_ON_UPDATE", "true").lower() == "true"
+    mark_resolved = env.get("MARK_RESOLVED", "true").lower() == "true"
 
     # Фильтры
-    host_groups_str = os.getenv("HOST_GROUPS", "")
-    host_groups = (
-        [g.strip() for g in host_groups_str.split(",") if g.strip()] if host_groups_str else None
-    )
-
-    excluded_hosts_str = os.getenv("EXCLUDED_HOSTS", "")
-    excluded_hosts = (
-        [h.strip() for h in excluded_hosts_str.split(",") if h.strip()]
-        if excluded_hosts_str
-        else None
-    )
+    host_groups = _split_csv(env.get("HOST_GROUPS", ""))
+    excluded_hosts = _split_csv(env.get("EXCLUDED_HOSTS", ""))
 
     # Тихие часы
-    quiet_hours_enabled = os.getenv("QUIET_HOURS_ENABLED", "false").lower() == "true"
-    quiet_hours_start = os.getenv("QUIET_HOURS_START", "22:00")
-    quiet_hours_end = os.getenv("QUIET_HOURS_END", "08:00")
-
-    quiet_hours_min_severity_str = os.getenv("QUIET_HOURS_MIN_SEVERITY", "4")
-    try:
-        quiet_hours_min_severity = int(quiet_hours_min_severity_str)
-        if not 0 <= quiet_hours_min_severity <= 5:
-            raise ValueError("QUIET_HOURS_MIN_SEVERITY должен быть в диапазоне 0-5")
-    except ValueError as e:
-        raise ValueError(f"Некорректное значение QUIET_HOURS_MIN_SEVERITY: {e}") from e
+    quiet_hours_enabled = env.get("QUIET_HOURS_ENABLED", "false").lower() == "true"
+    quiet_hours_start = env.get("QUIET_HOURS_START", "22:00")
+    quiet_hours_end = env.get("QUIET_HOURS_END", "08:00")
 
     return AppConfig(
         zabbix=zabbix_config,
         telegram=telegram_config,
-        poll_interval=poll_interval,
+        poll_interval=int_values["POLL_INTERVAL"],
         log_level=log_level,
-        max_retries=max_retries,
-        retry_delay=retry_delay,
-        min_severity=min_severity,
+        max_retries=int_values["MAX_RETRIES"],
+        retry_delay=int_values["RETRY_DELAY"],
+        min_severity=int_values["MIN_SEVERITY"],
         edit_on_update=edit_on_update,
-        delete_resolved_after=delete_resolved_after,
+        delete_resolved_after=int_values["DELETE_RESOLVED_AFTER"],
         mark_resolved=mark_resolved,
         host_groups=host_groups,
         excluded_hosts=excluded_hosts,
         quiet_hours_enabled=quiet_hours_enabled,
         quiet_hours_start=quiet_hours_start,
         quiet_hours_end=quiet_hours_end,
-        quiet_hours_min_severity=quiet_hours_min_severity,
+        quiet_hours_min_severity=int_values["QUIET_HOURS_MIN_SEVERITY"],
     )
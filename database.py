@@ -1,41 +1,152 @@
 """SQLite database for persistent storage of alerts and statistics."""
 
+from __future__ import annotations
+
+import asyncio
 import logging
 import os
+import time
 from contextlib import asynccontextmanager
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Set, Tuple
 
 import aiosqlite
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Настройки SQLite для каждого подключения: WAL превращает коммит в дозапись
+# в журнал, synchronous=NORMAL убирает fsync на каждую транзакцию
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+)
+
+# События audit log пишутся пакетами: по заполнению буфера или через интервал
+EVENT_BUFFER_SIZE = 100
+EVENT_FLUSH_INTERVAL = 1.0
+
+# Текущая локальная дата для statistics.date и момент начала следующих суток
+_today_cache: Tuple[str, float] = ("", 0.0)
+
+
+def _today() -> str:
+    """Возвращает текущую локальную дату (YYYY-MM-DD), пересчитывая ее раз в сутки."""
+    global _today_cache
+    date, next_day_at = _today_cache
+    now = time.time()
+    if now >= next_day_at:
+        today = datetime.fromtimestamp(now)
+        date = today.strftime("%Y-%m-%d")
+        midnight = today.replace(hour=0, minute=0, second=0, microsecond=0)
+        next_day_at = (midnight + timedelta(days=1)).timestamp()
+        _today_cache = (date, next_day_at)
+    return date
+
+
+# Запросы, выполняемые на горячем пути
+_SQL_SAVE_ALERT = """
+INSERT INTO alerts
+(event_id, message_id, status, severity, hostname, problem_name,
+ created_at, updated_at, metadata)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(event_id) DO UPDATE SET
+    message_id = excluded.message_id,
+    status = excluded.status,
+    updated_at = excluded.updated_at,
+    metadata = excluded.metadata
+"""
+_SQL_UPDATE_ALERT_STATUS = """
+UPDATE alerts
+SET status = ?, updated_at = ?, resolved_at = ?, acknowledged_at = ?
+WHERE event_id = ?
+"""
+_SQL_SELECT_ALERT = "SELECT * FROM alerts WHERE event_id = ?"
+_SQL_SELECT_ACTIVE_ALERTS = "SELECT * FROM alerts WHERE status = 'problem' ORDER BY created_at DESC"
+_SQL_SELECT_ALERTS_BY_STATUS = (
+    "SELECT * FROM alerts WHERE status = ? ORDER BY created_at DESC LIMIT ?"
+)
+_SQL_DELETE_OLD_ALERTS = "DELETE FROM alerts WHERE created_at < ?"
+_SQL_INSERT_STATISTIC = (
+    "INSERT INTO statistics (date, metric_name, metric_value, created_at) VALUES (?, ?, ?, ?)"
+)
+_SQL_SELECT_STATISTICS = """
+SELECT date, metric_name, SUM(metric_value) as total
+FROM statistics
+WHERE metric_name = ? AND date >= ?
+GROUP BY date
+ORDER BY date DESC
+"""
+_SQL_INSERT_EVENT = (
+    "INSERT INTO events (event_type, event_id, details, timestamp) VALUES (?, ?, ?, ?)"
+)
+_SQL_SELECT_RECENT_EVENTS = "SELECT * FROM events ORDER BY timestamp DESC LIMIT ?"
+_SQL_COUNT_BY_STATUS_SEVERITY = (
+    "SELECT status, severity, COUNT(*) FROM alerts GROUP BY status, severity"
+)
+
 
 class AlertDatabase:
     """Database для хранения информации об алертах."""
 
+    # Директории, уже созданные в этом процессе
+    _created_dirs: ClassVar[Set[str]] = set()
+
     def __init__(self, db_path: str = "data/alerts.db"):
         self.db_path = db_path
         self._ensure_data_directory()
 
+        # Одно долгоживущее подключение вместо открытия файла и рабочего потока
+        # aiosqlite на каждую операцию; блокировка не дает транзакциям перемешиваться
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+
+        self._event_buffer: List[Tuple[str, Optional[str], Optional[str], float]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
     def _ensure_data_directory(self):
         """Создает директорию для базы данных если её нет."""
         directory = os.path.dirname(self.db_path)
-        if directory:
+        if directory and directory not in AlertDatabase._created_dirs:
             os.makedirs(directory, exist_ok=True)
+            AlertDatabase._created_dirs.add(directory)
 
     @asynccontextmanager
     async def get_connection(self):
         """Context manager для получения подключения к БД."""
+        async with self._lock:
+            if self._conn is None:
+                self._conn = await self._connect()
+            conn = self._conn
+            try:
+                yield conn
+                await conn.commit()
+            except Exception as e:
+                await conn.rollback()
+                logger.error("Database error: %s", e)
+                raise
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Открывает подключение и применяет настройки SQLite."""
         conn = await aiosqlite.connect(self.db_path)
-        try:
-            yield conn
-            await conn.commit()
-        except Exception as e:
-            await conn.rollback()
-            logger.error(f"Database error: {e}")
-            raise
-        finally:
-            await conn.close()
+        conn.row_factory = aiosqlite.Row
+        for pragma in SQLITE_PRAGMAS:
+            await conn.execute(pragma)
+        return conn
+
+    async def close(self):
+        """Записывает буфер событий и закрывает подключение к БД."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush_events()
+
+        async with self._lock:
+            if self._conn is not None:
+                await self._conn.close()
+                self._conn = None
 
     async def initialize(self):
         """Инициализирует схему базы данных."""
@@ -85,8 +196,15 @@ class AlertDatabase:
                 """
             )
 
-            # Индексы
-            await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts(status)")
+            # Индексы: составные индексы по статусу покрывают подсчет по серьезности
+            # и выборку по статусу в порядке created_at без отдельной сортировки
+            await conn.execute("DROP INDEX IF EXISTS idx_alerts_status")
+            await conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alerts_status_severity ON alerts(status, severity)"
+            )
+            await conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alerts_status_created ON alerts(status, created_at)"
+            )
             await conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts(created_at)"
             )
@@ -95,7 +213,7 @@ class AlertDatabase:
                 "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)"
             )
 
-            logger.info(f"Database initialized at {self.db_path}")
+            logger.info("Database initialized at %s", self.db_path)
 
     async def save_alert(
         self,
@@ -108,25 +226,15 @@ class AlertDatabase:
         metadata: Optional[Dict[str, Any]] = None,
     ):
         """Сохраняет или обновляет алерт в базе."""
-        import json
-        import time
 
-        metadata_json = json.dumps(metadata) if metadata else None
+        metadata_json = (
+            orjson.dumps(metadata, option=orjson.OPT_NON_STR_KEYS).decode() if metadata else None
+        )
         current_time = time.time()
 
         async with self.get_connection() as conn:
             await conn.execute(
-                """
-                INSERT INTO alerts
-                (event_id, message_id, status, severity, hostname, problem_name,
-                 created_at, updated_at, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(event_id) DO UPDATE SET
-                    message_id = excluded.message_id,
-                    status = excluded.status,
-                    updated_at = excluded.updated_at,
-                    metadata = excluded.metadata
-                """,
+                _SQL_SAVE_ALERT,
                 (
                     event_id,
                     message_id,
@@ -148,150 +256,153 @@ class AlertDatabase:
         acknowledged_at: Optional[float] = None,
     ):
         """Обновляет статус алерта."""
-        import time
 
         async with self.get_connection() as conn:
             await conn.execute(
-                """
-                UPDATE alerts
-                SET status = ?, updated_at = ?, resolved_at = ?, acknowledged_at = ?
-                WHERE event_id = ?
-                """,
+                _SQL_UPDATE_ALERT_STATUS,
                 (status, time.time(), resolved_at, acknowledged_at, event_id),
             )
 
     async def get_alert(self, event_id: str) -> Optional[Dict[str, Any]]:
         """Получает алерт по event_id."""
         async with self.get_connection() as conn:
-            async with conn.execute(
-                "SELECT * FROM alerts WHERE event_id = ?", (event_id,)
-            ) as cursor:
+            async with conn.execute(_SQL_SELECT_ALERT, (event_id,)) as cursor:
                 row = await cursor.fetchone()
-                if row:
-                    columns = [desc[0] for desc in cursor.description]
-                    return dict(zip(columns, row))
-                return None
+                return dict(row) if row else None
 
     async def get_active_alerts(self) -> List[Dict[str, Any]]:
         """Получает все активные алерты."""
         async with self.get_connection() as conn:
-            async with conn.execute(
-                "SELECT * FROM alerts WHERE status = 'problem' ORDER BY created_at DESC"
-            ) as cursor:
-                rows = await cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in rows]
+            async with conn.execute(_SQL_SELECT_ACTIVE_ALERTS) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
 
     async def get_alerts_by_status(self, status: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Получает алерты по статусу."""
         async with self.get_connection() as conn:
             async with conn.execute(
-                "SELECT * FROM alerts WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                _SQL_SELECT_ALERTS_BY_STATUS,
                 (status, limit),
             ) as cursor:
-                rows = await cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in rows]
+                return [dict(row) for row in await cursor.fetchall()]
 
     async def delete_old_alerts(self, days: int = 30):
         """Удаляет старые алерты."""
-        import time
 
         cutoff_time = time.time() - (days * 24 * 3600)
         async with self.get_connection() as conn:
-            result = await conn.execute("DELETE FROM alerts WHERE created_at < ?", (cutoff_time,))
+            result = await conn.execute(_SQL_DELETE_OLD_ALERTS, (cutoff_time,))
             deleted_count = result.rowcount
-            logger.info(f"Deleted {deleted_count} old alerts (older than {days} days)")
+            logger.info("Deleted %d old alerts (older than %d days)", deleted_count, days)
             return deleted_count
 
     async def save_statistic(self, metric_name: str, metric_value: int):
         """Сохраняет статистику."""
-        import time
-        from datetime import datetime
 
-        date = datetime.now().strftime("%Y-%m-%d")
+        date = _today()
         async with self.get_connection() as conn:
             await conn.execute(
-                "INSERT INTO statistics (date, metric_name, metric_value, created_at) VALUES (?, ?, ?, ?)",
+                _SQL_INSERT_STATISTIC,
                 (date, metric_name, metric_value, time.time()),
             )
 
+    async def save_statistics_bulk(self, metrics: Sequence[Tuple[str, int]]):
+        """Сохраняет несколько метрик одной транзакцией."""
+        if not metrics:
+            return
+
+        date = _today()
+        current_time = time.time()
+        async with self.get_connection() as conn:
+            await conn.executemany(
+                _SQL_INSERT_STATISTIC,
+                [
+                    (date, metric_name, metric_value, current_time)
+                    for metric_name, metric_value in metrics
+                ],
+            )
+
     async def get_statistics(self, metric_name: str, days: int = 7) -> List[Dict[str, Any]]:
         """Получает статистику за период."""
-        from datetime import datetime, timedelta
 
         start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
 
         async with self.get_connection() as conn:
             async with conn.execute(
-                """
-                SELECT date, metric_name, SUM(metric_value) as total
-                FROM statistics
-                WHERE metric_name = ? AND date >= ?
-                GROUP BY date
-                ORDER BY date DESC
-                """,
+                _SQL_SELECT_STATISTICS,
                 (metric_name, start_date),
             ) as cursor:
-                rows = await cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in rows]
+                return [dict(row) for row in await cursor.fetchall()]
 
     async def log_event(
         self, event_type: str, event_id: Optional[str] = None, details: Optional[str] = None
     ):
-        """Логирует событие в audit log."""
-        import time
+        """Логирует событие в audit log (запись в БД выполняется пакетами)."""
+        self._event_buffer.append((event_type, event_id, details, time.time()))
 
+        if len(self._event_buffer) >= EVENT_BUFFER_SIZE:
+            await self.flush_events()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_events_later())
+
+    async def log_events_bulk(self, events: Sequence[Tuple[str, Optional[str], Optional[str]]]):
+        """Записывает несколько событий (event_type, event_id, details) одной транзакцией."""
+        current_time = time.time()
+        self._event_buffer.extend(
+            (event_type, event_id, details, current_time)
+            for event_type, event_id, details in events
+        )
+        await self.flush_events()
+
+    async def _flush_events_later(self):
+        """Записывает буфер событий через EVENT_FLUSH_INTERVAL секунд."""
+        await asyncio.sleep(EVENT_FLUSH_INTERVAL)
+        self._flush_task = None
+        try:
+            await self.flush_events()
+        except Exception as e:
+            logger.error("Failed to flush events: %s", e)
+
+    async def flush_events(self):
+        """Записывает накопленные события одной транзакцией."""
+        if not self._event_buffer:
+            return
+
+        events, self._event_buffer = self._event_buffer, []
         async with self.get_connection() as conn:
-            await conn.execute(
-                "INSERT INTO events (event_type, event_id, details, timestamp) VALUES (?, ?, ?, ?)",
-                (event_type, event_id, details, time.time()),
+            await conn.executemany(
+                _SQL_INSERT_EVENT,
+                events,
             )
 
     async def get_recent_events(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Получает последние события."""
+        await self.flush_events()
+
         async with self.get_connection() as conn:
-            async with conn.execute(
-                "SELECT * FROM events ORDER BY timestamp DESC LIMIT ?", (limit,)
-            ) as cursor:
-                rows = await cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in rows]
+            async with conn.execute(_SQL_SELECT_RECENT_EVENTS, (limit,)) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
 
     async def get_stats_summary(self) -> Dict[str, Any]:
         """Получает сводную статистику."""
-        async with self.get_connection() as conn:
-            # Общее количество алертов
-            async with conn.execute("SELECT COUNT(*) FROM alerts") as cursor:
-                total_alerts = (await cursor.fetchone())[0]
+        total_alerts = 0
+        active_alerts = 0
+        resolved_alerts = 0
+        severity_counts: Dict[int, int] = {}
 
-            # Активные алерты
-            async with conn.execute(
-                "SELECT COUNT(*) FROM alerts WHERE status = 'problem'"
-            ) as cursor:
-                active_alerts = (await cursor.fetchone())[0]
-
-            # Решенные алерты
-            async with conn.execute(
-                "SELECT COUNT(*) FROM alerts WHERE status = 'resolved'"
-            ) as cursor:
-                resolved_alerts = (await cursor.fetchone())[0]
-
-            # Алерты по серьезности
-            async with conn.execute(
-                """
-                SELECT severity, COUNT(*) as count
-                FROM alerts
-                WHERE status = 'problem'
-                GROUP BY severity
-                """
-            ) as cursor:
-                severity_counts = {row[0]: row[1] for row in await cursor.fetchall()}
-
-            return {
-                "total_alerts": total_alerts,
-                "active_alerts": active_alerts,
-                "resolved_alerts": resolved_alerts,
-                "severity_distribution": severity_counts,
-            }
+        # Все счетчики собираются одним проходом по (status, severity)
+        async with self.get_connection() as conn:
+            async with conn.execute(_SQL_COUNT_BY_STATUS_SEVERITY) as cursor:
+                for status, severity, count in await cursor.fetchall():
+                    total_alerts += count
+                    if status == "problem":
+                        active_alerts += count
+                        severity_counts[severity] = count
+                    elif status == "resolved":
+                        resolved_alerts += count
+
+        return {
+            "total_alerts": total_alerts,
+            "active_alerts": active_alerts,
+            "resolved_alerts": resolved_alerts,
+            "severity_distribution": severity_counts,
+        }
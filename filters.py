@@ -1,16 +1,43 @@
 """Фильтры для алертов (по группам хостов, времени, и т.д.)."""
 
 import logging
-from datetime import datetime
+import time
 from datetime import time as dt_time
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=16)
+def _parse_time(time_str: str) -> dt_time:
+    """Парсит строку времени в объект time (результат кешируется)."""
+    try:
+        hour, minute = map(int, time_str.split(":"))
+        return dt_time(hour, minute)
+    except Exception as e:
+        logger.error("Failed to parse time '%s': %s", time_str, e)
+        return dt_time(0, 0)
+
+
 class AlertFilters:
     """Класс для фильтрации алертов."""
 
+    __slots__ = (
+        "min_severity",
+        "host_groups",
+        "excluded_hosts",
+        "_host_groups_set",
+        "_excluded_hosts_set",
+        "quiet_hours_enabled",
+        "quiet_hours_start",
+        "quiet_hours_end",
+        "quiet_hours_min_severity",
+        "_quiet_start_sec",
+        "_quiet_end_sec",
+        "_quiet_wraps",
+    )
+
     def __init__(
         self,
         min_severity: int = 2,
@@ -24,85 +51,135 @@ class AlertFilters:
         self.min_severity = min_severity
         self.host_groups = host_groups or []
         self.excluded_hosts = excluded_hosts or []
+        # Множества для проверки принадлежности за O(1); списки сохраняются для вывода
+        self._host_groups_set = frozenset(self.host_groups)
+        self._excluded_hosts_set = frozenset(self.excluded_hosts)
         self.quiet_hours_enabled = quiet_hours_enabled
-        self.quiet_hours_start = self._parse_time(quiet_hours_start)
-        self.quiet_hours_end = self._parse_time(quiet_hours_end)
+        self.quiet_hours_start = _parse_time(quiet_hours_start)
+        self.quiet_hours_end = _parse_time(quiet_hours_end)
         self.quiet_hours_min_severity = quiet_hours_min_severity
 
-    @staticmethod
-    def _parse_time(time_str: str) -> dt_time:
-        """Парсит строку времени в объект time."""
-        try:
-            hour, minute = map(int, time_str.split(":"))
-            return dt_time(hour, minute)
-        except Exception as e:
-            logger.error(f"Failed to parse time '{time_str}': {e}")
-            return dt_time(0, 0)
+        # Окно тихих часов в секундах от полуночи: проверка сводится к сравнению целых.
+        # Секунды, а не минуты, чтобы окно заканчивалось ровно в HH:MM:00
+        self._quiet_start_sec = (
+            self.quiet_hours_start.hour * 3600 + self.quiet_hours_start.minute * 60
+        )
+        self._quiet_end_sec = self.quiet_hours_end.hour * 3600 + self.quiet_hours_end.minute * 60
+        self._quiet_wraps = self._quiet_start_sec > self._quiet_end_sec
 
     def is_in_quiet_hours(self) -> bool:
         """Проверяет, находимся ли мы в тихих часах."""
         if not self.quiet_hours_enabled:
             return False
 
-        now = datetime.now().time()
+        # struct_time из C вместо построения datetime и time
+        now = time.localtime()
+        now_sec = now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec
 
         # Если quiet hours переходят через полночь
-        if self.quiet_hours_start > self.quiet_hours_end:
-            return now >= self.quiet_hours_start or now <= self.quiet_hours_end
-        else:
-            return self.quiet_hours_start <= now <= self.quiet_hours_end
+        if self._quiet_wraps:
+            return now_sec >= self._quiet_start_sec or now_sec <= self._quiet_end_sec
+        return self._quiet_start_sec <= now_sec <= self._quiet_end_sec
+
+    def current_min_severity(self) -> int:
+        """Возвращает действующий порог серьезности (в тихие часы - повышенный)."""
+        if self.is_in_quiet_hours():
+            return self.quiet_hours_min_severity
+        return self.min_severity
+
+    def should_send_alert(
+        self, problem_details: Dict[str, Any], min_severity: Optional[int] = None
+    ) -> bool:
+        """Определяет, нужно ли отправлять алерт.
 
-    def should_send_alert(self, problem_details: Dict[str, Any]) -> bool:
-        """Определяет, нужно ли отправлять алерт."""
+        min_severity - заранее вычисленный current_min_severity() для пакетной проверки.
+        """
+        return self._check_alert(problem_details, min_severity)
+
+    def _check_alert(
+        self,
+        problem_details: Dict[str, Any],
+        min_severity: Optional[int],
+        host_cache: Optional[Dict[str, Tuple[bool, bool]]] = None,
+    ) -> bool:
+        """Проверяет алерт по всем фильтрам."""
         problem = problem_details.get("problem", {})
         hosts = problem_details.get("hosts", [])
 
-        # Фильтр по серьезности
-        severity = int(problem.get("severity", 0))
-
-        # В тихие часы применяем повышенный порог серьезности
-        if self.is_in_quiet_hours():
-            if severity < self.quiet_hours_min_severity:
-                logger.debug(
-                    f"Alert filtered during quiet hours: severity {severity} < {self.quiet_hours_min_severity}"
-                )
-                return False
-        else:
-            if severity < self.min_severity:
-                logger.debug(f"Alert filtered by severity: {severity} < {self.min_severity}")
-                return False
+        # Проверки упорядочены от самых дешевых к самым дорогим
 
         # Фильтр по статусу (только активные проблемы)
         if problem.get("r_eventid", "0") != "0":
             logger.debug("Alert filtered: problem is resolved")
             return False
 
-        # Фильтр по группам хостов
-        if self.host_groups:
-            host_in_allowed_group = False
-            for host in hosts:
-                host_groups = host.get("groups", [])
-                for group in host_groups:
-                    if group.get("name") in self.host_groups:
-                        host_in_allowed_group = True
-                        break
-                if host_in_allowed_group:
-                    break
-
-            if not host_in_allowed_group:
-                logger.debug(f"Alert filtered: host not in allowed groups {self.host_groups}")
+        # Фильтр по серьезности
+        if min_severity is None:
+            min_severity = self.current_min_severity()
+
+        severity = int(problem.get("severity", 0))
+        if severity < min_severity:
+            logger.debug("Alert filtered by severity: %d < %d", severity, min_severity)
+            return False
+
+        # Фильтры по хостам (исключения и разрешенные группы)
+        return self._hosts_allowed(hosts, host_cache)
+
+    def _classify_host(self, host: Dict[str, Any]) -> Tuple[bool, bool]:
+        """Возвращает (хост исключен, хост входит в разрешенную группу)."""
+        excluded = host.get("host", "") in self._excluded_hosts_set
+        in_allowed_group = bool(self._host_groups_set) and not self._host_groups_set.isdisjoint(
+            group.get("name") for group in host.get("groups", ())
+        )
+        return excluded, in_allowed_group
+
+    def _hosts_allowed(
+        self,
+        hosts: List[Dict[str, Any]],
+        host_cache: Optional[Dict[str, Tuple[bool, bool]]] = None,
+    ) -> bool:
+        """Проверяет хосты алерта по исключениям и разрешенным группам.
+
+        host_cache - решения по hostid, накопленные в пределах одного пакета.
+        """
+        if not (self._excluded_hosts_set or self._host_groups_set):
+            return True
+
+        host_in_allowed_group = False
+        for host in hosts:
+            host_id = host.get("hostid")
+            decision = host_cache.get(host_id) if host_cache is not None and host_id else None
+            if decision is None:
+                decision = self._classify_host(host)
+                if host_cache is not None and host_id:
+                    host_cache[host_id] = decision
+
+            excluded, in_allowed_group = decision
+            if excluded:
+                logger.debug("Alert filtered: host '%s' is excluded", host.get("host", ""))
                 return False
+            host_in_allowed_group = host_in_allowed_group or in_allowed_group
 
-        # Фильтр исключенных хостов
-        if self.excluded_hosts:
-            for host in hosts:
-                host_name = host.get("host", "")
-                if host_name in self.excluded_hosts:
-                    logger.debug(f"Alert filtered: host '{host_name}' is excluded")
-                    return False
+        if self._host_groups_set and not host_in_allowed_group:
+            logger.debug("Alert filtered: host not in allowed groups %s", self.host_groups)
+            return False
 
         return True
 
+    def filter_problems(self, problems_details: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Возвращает алерты, которые нужно отправить.
+
+        Тихие часы проверяются один раз, а решение по каждому хосту (hostid)
+        принимается один раз на пакет - у многих триггеров общий хост.
+        """
+        min_severity = self.current_min_severity()
+        host_cache: Dict[str, Tuple[bool, bool]] = {}
+        return [
+            details
+            for details in problems_details
+            if self._check_alert(details, min_severity, host_cache)
+        ]
+
     def get_filter_summary(self) -> str:
         """Возвращает краткое описание настроенных фильтров."""
         summary = []
@@ -129,16 +206,10 @@ def create_filters_from_config(config) -> AlertFilters:
     """Создает объект фильтров из конфигурации."""
     return AlertFilters(
         min_severity=config.min_severity,
-        host_groups=config.host_groups if hasattr(config, "host_groups") else None,
-        excluded_hosts=config.excluded_hosts if hasattr(config, "excluded_hosts") else None,
-        quiet_hours_enabled=(
-            config.quiet_hours_enabled if hasattr(config, "quiet_hours_enabled") else False
-        ),
-        quiet_hours_start=(
-            config.quiet_hours_start if hasattr(config, "quiet_hours_start") else "22:00"
-        ),
-        quiet_hours_end=config.quiet_hours_end if hasattr(config, "quiet_hours_end") else "08:00",
-        quiet_hours_min_severity=(
-            config.quiet_hours_min_severity if hasattr(config, "quiet_hours_min_severity") else 4
-        ),
+        host_groups=getattr(config, "host_groups", None),
+        excluded_hosts=getattr(config, "excluded_hosts", None),
+        quiet_hours_enabled=getattr(config, "quiet_hours_enabled", False),
+        quiet_hours_start=getattr(config, "quiet_hours_start", "22:00"),
+        quiet_hours_end=getattr(config, "quiet_hours_end", "08:00"),
+        quiet_hours_min_severity=getattr(config, "quiet_hours_min_severity", 4),
     )
@@ -22,8 +22,11 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+import queue
 import signal
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional
 
@@ -50,6 +53,29 @@ def get_version() -> str:
 __version__ = get_version()
 
 
+class CachedTimeFormatter(logging.Formatter):
+    """Форматтер, кеширующий строку времени с точностью до секунды
+
+    localtime и strftime вызываются один раз в секунду, а не для каждой записи;
+    миллисекунды дописываются к закешированной строке как в logging.Formatter.
+    """
+
+    def __init__(self, fmt: Optional[str] = None, datefmt: Optional[str] = None) -> None:
+        super().__init__(fmt, datefmt)
+        self._cached_second = -1
+        self._cached_time = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        second = int(record.created)
+        if second != self._cached_second:
+            ct = self.converter(record.created)
+            self._cached_time = time.strftime(datefmt or self.default_time_format, ct)
+            self._cached_second = second
+        if datefmt or not self.default_msec_format:
+            return self._cached_time
+        return self.default_msec_format % (self._cached_time, record.msecs)
+
+
 class ZabbixTelegramBot:
     """Главный класс приложения"""
 
@@ -59,22 +85,38 @@ class ZabbixTelegramBot:
         self.telegram_bot: Optional[TelegramBot] = None
         self.alert_monitor: Optional[AlertMonitor] = None
         self.logger = logging.getLogger(__name__)
+        self._log_listener: Optional[QueueListener] = None
 
     def setup_logging(self) -> None:
         """Настраивает логирование"""
         if self.config is None:
             raise RuntimeError("Конфигурация не загружена, логирование невозможно настроить")
 
+        # Повторный вызов не дублирует обработчики и поток логирования: как и
+        # basicConfig, пропускаем настройку, если у корневого логгера уже есть обработчики
+        if logging.getLogger().handlers:
+            self.logger.debug("Логирование уже настроено, повторная настройка пропущена")
+            return
+
         log_level = getattr(logging, self.config.log_level.upper(), logging.INFO)
 
         # Создаем директорию для логов если нужно
         os.makedirs("logs", exist_ok=True)
 
-        logging.basicConfig(
-            level=log_level,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            handlers=[logging.StreamHandler(sys.stdout), logging.FileHandler("logs/zbxtg.log")],
+        # Запись в stdout и файл выполняется фоновым потоком QueueListener,
+        # чтобы блокирующий ввод-вывод не задерживал event loop. Сообщение
+        # форматируется QueueHandler, обработчики вывода пишут его как есть
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self._log_listener = QueueListener(
+            log_queue, logging.StreamHandler(sys.stdout), logging.FileHandler("logs/zbxtg.log")
         )
+        self._log_listener.start()
+
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(
+            CachedTimeFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+        logging.basicConfig(level=log_level, handlers=[queue_handler])
 
         # Снижаем уровень логирования для некоторых библиотек
         logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -186,7 +228,7 @@ class ZabbixTelegramBot:
             ]
 
             # Добавляем обработчик сигналов для корректной остановки
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
 
             def signal_handler() -> None:
                 self.logger.info("Получен сигнал завершения")
@@ -241,6 +283,11 @@ class ZabbixTelegramBot:
 
         self.logger.info("Завершение выполнено")
 
+        # Дописываем оставшиеся в очереди записи и останавливаем поток логирования
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener = None
+
 
 async def main() -> None:
     """Точка входа в приложение"""
@@ -1,104 +1,235 @@
-"""Prometheus metrics for monitoring application performance."""
+"""Prometheus metrics for monitoring application performance.
+
+prometheus_client is imported and the metrics are registered on first access
+to any of them (or when the metrics server starts), so deployments that do not
+use metrics do not pay for the import.
+"""
+
+from __future__ import annotations
 
 import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict
 
-from prometheus_client import Counter, Gauge, Histogram, Info, start_http_server
+if TYPE_CHECKING:
+    from prometheus_client import Counter, Gauge, Histogram, Info
 
 logger = logging.getLogger(__name__)
 
-# Application info
-app_info = Info("zbxtg_app", "Application information")
-
-# Zabbix metrics
-zabbix_requests_total = Counter(
-    "zbxtg_zabbix_requests_total",
-    "Total number of Zabbix API requests",
-    ["method", "status"],
+# Label values known in advance. Hot paths use pre-bound children, e.g.
+# alerts_sent_by_severity[severity].inc(), instead of .labels(...) per call;
+# binding also exports these series with zero values from startup.
+SEVERITIES = ("0", "1", "2", "3", "4", "5")
+MESSAGE_STATUSES = ("success", "error")
+ZABBIX_METHODS = (
+    "user.login",
+    "apiinfo.version",
+    "problem.get",
+    "trigger.get",
+    "host.get",
+    "event.get",
 )
 
-zabbix_request_duration_seconds = Histogram(
-    "zbxtg_zabbix_request_duration_seconds",
-    "Zabbix API request duration in seconds",
-    ["method"],
-    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0),
-)
+# Metrics are created lazily by _create_metrics()
+app_info: Info
+zabbix_requests_total: Counter
+zabbix_request_duration_seconds: Histogram
+zabbix_problems_found: Counter
+telegram_messages_sent_total: Counter
+telegram_messages_edited_total: Counter
+telegram_messages_deleted_total: Counter
+alerts_sent_total: Counter
+alerts_failed_total: Counter
+alerts_updated_total: Counter
+active_alerts: Gauge
+failed_alerts_queue: Gauge
+monitor_checks_total: Counter
+monitor_errors_total: Counter
+monitor_last_check_timestamp: Gauge
+app_uptime_seconds: Gauge
+zabbix_request_duration_by_method: Dict[str, Histogram]
+zabbix_problems_found_by_severity: Dict[str, Counter]
+alerts_sent_by_severity: Dict[str, Counter]
+telegram_messages_sent_by_status: Dict[str, Counter]
+telegram_messages_edited_by_status: Dict[str, Counter]
+telegram_messages_deleted_by_status: Dict[str, Counter]
+start_http_server: Callable[..., Any]
 
-zabbix_problems_found = Counter(
-    "zbxtg_zabbix_problems_found_total",
-    "Total number of problems found in Zabbix",
-    ["severity"],
-)
+_LAZY_ATTRIBUTES = frozenset(__annotations__)
+_metrics_created = False
 
-# Telegram metrics
-telegram_messages_sent_total = Counter(
-    "zbxtg_telegram_messages_sent_total",
-    "Total number of Telegram messages sent",
-    ["status"],
-)
 
-telegram_messages_edited_total = Counter(
-    "zbxtg_telegram_messages_edited_total",
-    "Total number of Telegram messages edited",
-    ["status"],
-)
+def _create_metrics() -> None:
+    """Imports prometheus_client and registers all metrics (once)."""
+    global _metrics_created
+    if _metrics_created:
+        return
 
-telegram_messages_deleted_total = Counter(
-    "zbxtg_telegram_messages_deleted_total",
-    "Total number of Telegram messages deleted",
-    ["status"],
-)
+    from prometheus_client import Counter, Gauge, Histogram, Info
+    from prometheus_client import start_http_server as _start_http_server
 
-# Alert metrics
-alerts_sent_total = Counter(
-    "zbxtg_alerts_sent_total",
-    "Total number of alerts sent",
-    ["severity"],
-)
+    global app_info, zabbix_requests_total, zabbix_request_duration_seconds
+    global zabbix_problems_found, telegram_messages_sent_total
+    global telegram_messages_edited_total, telegram_messages_deleted_total
+    global alerts_sent_total, alerts_failed_total, alerts_updated_total, active_alerts
+    global failed_alerts_queue, monitor_checks_total, monitor_errors_total
+    global monitor_last_check_timestamp, app_uptime_seconds
+    global zabbix_request_duration_by_method, zabbix_problems_found_by_severity
+    global alerts_sent_by_severity, telegram_messages_sent_by_status
+    global telegram_messages_edited_by_status, telegram_messages_deleted_by_status
+    global start_http_server
 
-alerts_failed_total = Counter(
-    "zbxtg_alerts_failed_total",
-    "Total number of failed alert sends",
-    ["reason"],
-)
+    start_http_server = _start_http_server
 
-alerts_updated_total = Counter(
-    "zbxtg_alerts_updated_total",
-    "Total number of alerts updated",
-    ["status_change"],
-)
+    # Application info
+    app_info = Info("zbxtg_app", "Application information")
 
-active_alerts = Gauge(
-    "zbxtg_active_alerts",
-    "Current number of active alerts being tracked",
-)
+    # Zabbix metrics
+    zabbix_requests_total = Counter(
+        "zbxtg_zabbix_requests_total",
+        "Total number of Zabbix API requests",
+        ["method", "status"],
+    )
 
-failed_alerts_queue = Gauge(
-    "zbxtg_failed_alerts_queue",
-    "Current number of alerts in failed queue waiting for retry",
-)
+    zabbix_request_duration_seconds = Histogram(
+        "zbxtg_zabbix_request_duration_seconds",
+        "Zabbix API request duration in seconds",
+        ["method"],
+        buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0),
+    )
 
-# Monitor metrics
-monitor_checks_total = Counter(
-    "zbxtg_monitor_checks_total",
-    "Total number of monitoring check cycles",
-)
+    zabbix_problems_found = Counter(
+        "zbxtg_zabbix_problems_found_total",
+        "Total number of problems found in Zabbix",
+        ["severity"],
+    )
 
-monitor_errors_total = Counter(
-    "zbxtg_monitor_errors_total",
-    "Total number of monitoring errors",
-    ["error_type"],
-)
+    # Telegram metrics
+    telegram_messages_sent_total = Counter(
+        "zbxtg_telegram_messages_sent_total",
+        "Total number of Telegram messages sent",
+        ["status"],
+    )
 
-monitor_last_check_timestamp = Gauge(
-    "zbxtg_monitor_last_check_timestamp",
-    "Unix timestamp of last successful monitoring check",
-)
+    telegram_messages_edited_total = Counter(
+        "zbxtg_telegram_messages_edited_total",
+        "Total number of Telegram messages edited",
+        ["status"],
+    )
 
-# System metrics
-app_uptime_seconds = Gauge(
-    "zbxtg_app_uptime_seconds",
-    "Application uptime in seconds",
-)
+    telegram_messages_deleted_total = Counter(
+        "zbxtg_telegram_messages_deleted_total",
+        "Total number of Telegram messages deleted",
+        ["status"],
+    )
+
+    # Alert metrics
+    alerts_sent_total = Counter(
+        "zbxtg_alerts_sent_total",
+        "Total number of alerts sent",
+        ["severity"],
+    )
+
+    alerts_failed_total = Counter(
+        "zbxtg_alerts_failed_total",
+        "Total number of failed alert sends",
+        ["reason"],
+    )
+
+    alerts_updated_total = Counter(
+        "zbxtg_alerts_updated_total",
+        "Total number of alerts updated",
+        ["status_change"],
+    )
+
+    active_alerts = Gauge(
+        "zbxtg_active_alerts",
+        "Current number of active alerts being tracked",
+    )
+
+    failed_alerts_queue = Gauge(
+        "zbxtg_failed_alerts_queue",
+        "Current number of alerts in failed queue waiting for retry",
+    )
+
+    # Monitor metrics
+    monitor_checks_total = Counter(
+        "zbxtg_monitor_checks_total",
+        "Total number of monitoring check cycles",
+    )
+
+    monitor_errors_total = Counter(
+        "zbxtg_monitor_errors_total",
+        "Total number of monitoring errors",
+        ["error_type"],
+    )
+
+    monitor_last_check_timestamp = Gauge(
+        "zbxtg_monitor_last_check_timestamp",
+        "Unix timestamp of last successful monitoring check",
+    )
+
+    # System metrics
+    app_uptime_seconds = Gauge(
+        "zbxtg_app_uptime_seconds",
+        "Application uptime in seconds",
+    )
+
+    # Pre-bound children for label values known in advance
+    zabbix_request_duration_by_method = {
+        method: zabbix_request_duration_seconds.labels(method=method) for method in ZABBIX_METHODS
+    }
+
+    zabbix_problems_found_by_severity = {
+        severity: zabbix_problems_found.labels(severity=severity) for severity in SEVERITIES
+    }
+    alerts_sent_by_severity = {
+        severity: alerts_sent_total.labels(severity=severity) for severity in SEVERITIES
+    }
+    telegram_messages_sent_by_status = {
+        status: telegram_messages_sent_total.labels(status=status) for status in MESSAGE_STATUSES
+    }
+    telegram_messages_edited_by_status = {
+        status: telegram_messages_edited_total.labels(status=status) for status in MESSAGE_STATUSES
+    }
+    telegram_messages_deleted_by_status = {
+        status: telegram_messages_deleted_total.labels(status=status) for status in MESSAGE_STATUSES
+    }
+
+    _metrics_created = True
+
+
+def __getattr__(name: str) -> Any:
+    """Creates the metrics on first access to any of them."""
+    if name in _LAZY_ATTRIBUTES:
+        _create_metrics()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Gauge delta helpers: callers report queue/tracking changes as they happen
+# instead of re-setting the gauge to a recomputed length.
+def active_alert_added() -> None:
+    """Increments the number of tracked active alerts."""
+    _create_metrics()
+    active_alerts.inc()
+
+
+def active_alert_removed() -> None:
+    """Decrements the number of tracked active alerts."""
+    _create_metrics()
+    active_alerts.dec()
+
+
+def failed_alert_enqueued() -> None:
+    """Increments the failed alerts retry queue size."""
+    _create_metrics()
+    failed_alerts_queue.inc()
+
+
+def failed_alert_dequeued() -> None:
+    """Decrements the failed alerts retry queue size."""
+    _create_metrics()
+    failed_alerts_queue.dec()
 
 
 class MetricsServer:
@@ -120,9 +251,10 @@ class MetricsServer:
             return
 
         try:
+            _create_metrics()
             start_http_server(self.port)
             self.started = True
-            logger.info(f"Metrics server started on port {self.port}")
+            logger.info("Metrics server started on port %s", self.port)
 
             # Set application info
             app_info.info(
@@ -132,7 +264,7 @@ class MetricsServer:
                 }
             )
         except Exception as e:
-            logger.error(f"Failed to start metrics server: {e}")
+            logger.error("Failed to start metrics server: %s", e)
 
     def is_running(self) -> bool:
         """Check if metrics server is running."""
@@ -1,9 +1,16 @@
 """Structured logging configuration with JSON output support."""
 
+import atexit
+import copy
 import logging
 import os
+import queue
 import sys
-from typing import Any, Dict, Optional
+import threading
+from datetime import datetime
+from functools import cache
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
 
 from pythonjsonlogger import jsonlogger
 
@@ -23,22 +30,127 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
         # Add standard fields
         log_record["logger"] = record.name
         log_record["level"] = record.levelname
+        # Always a string: ISO 8601 without datefmt, see formatTime()
         log_record["timestamp"] = self.formatTime(record, self.datefmt)
 
-        # Add context if available
-        if hasattr(record, "context"):
-            log_record["context"] = record.context
+        # Add context if available (single lookup instead of hasattr + getattr)
+        context = record.__dict__.get("context")
+        if context is not None:
+            log_record["context"] = context
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        """Format record time, using ISO 8601 when no datefmt is given."""
+        if datefmt is None:
+            return datetime.fromtimestamp(record.created).isoformat(timespec="seconds")
+        return super().formatTime(record, datefmt)
+
+
+class RecordQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener's handlers.
+
+    The stock prepare() formats the record on the calling thread and clears
+    exc_info, so the JSON formatter would get the traceback merged into
+    "message" instead of a separate "exc_info" field. Here only the message is
+    resolved (so later changes to args do not leak into the output); exc_info
+    and stack_info travel with the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Return a copy of the record with msg % args already applied."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# Records buffered before the log file is written
+FILE_BUFFER_CAPACITY = 256
+
+# Seconds between periodic flushes of the file buffer
+FILE_FLUSH_INTERVAL = 5.0
+
+
+class PeriodicMemoryHandler(MemoryHandler):
+    """MemoryHandler that also flushes its buffer every flush_interval seconds.
+
+    Durability trade-off: ERROR records and a full buffer are still written
+    immediately, and a clean shutdown flushes everything. A process killed
+    without running atexit handlers (SIGKILL, OOM killer) loses at most the
+    lower-level lines logged during the last flush_interval seconds, instead of
+    up to capacity - 1 lines on a quiet system.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        flushLevel: int = logging.ERROR,
+        target: Optional[logging.Handler] = None,
+        flush_interval: float = FILE_FLUSH_INTERVAL,
+    ) -> None:
+        super().__init__(capacity, flushLevel=flushLevel, target=target)
+        self.flush_interval = flush_interval
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="log-file-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        """Flush the buffer until the handler is closed."""
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the flush thread, then flush and close as MemoryHandler does."""
+        self._closed.set()
+        self._flusher.join()
+        super().close()
+
+
+# Set once setup_structured_logging() has configured the root logger
+_configured = False
+
+# Background thread writing records to the real handlers
+_listener: Optional[QueueListener] = None
+
+
+def _stop_listener() -> None:
+    """Stop the background listener, flushing queued records."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        # MemoryHandler.close() flushes the buffer but leaves its target open
+        target = handler.target if isinstance(handler, MemoryHandler) else None
+        handler.close()
+        if target is not None:
+            target.close()
+    _listener = None
+
+
+atexit.register(_stop_listener)
 
 
 def setup_structured_logging(
     level: str = "INFO",
     json_output: bool = False,
     log_file: Optional[str] = None,
+    force: bool = False,
 ) -> None:
-    """Setup structured logging for the application."""
+    """Setup structured logging for the application.
+
+    Repeated calls are no-ops unless force=True, so handlers are not torn down
+    and re-added (and logger level caches not invalidated) on every call.
+    """
+    global _configured, _listener
+    if _configured and not force:
+        return
+
     log_level = getattr(logging, level.upper(), logging.INFO)
 
     # Remove existing handlers
+    _stop_listener()
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
@@ -60,7 +172,8 @@ def setup_structured_logging(
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
     console_handler.setLevel(log_level)
-    root_logger.addHandler(console_handler)
+    handlers: List[logging.Handler] = [console_handler]
+    file_error: Optional[OSError] = None
 
     # File handler (if specified)
     if log_file:
@@ -72,29 +185,51 @@ def setup_structured_logging(
             file_handler = logging.FileHandler(log_file)
             file_handler.setFormatter(formatter)
             file_handler.setLevel(log_level)
-            root_logger.addHandler(file_handler)
+            # Lines are written in batches; errors and shutdown flush immediately,
+            # everything else within FILE_FLUSH_INTERVAL seconds
+            buffered_handler = PeriodicMemoryHandler(
+                FILE_BUFFER_CAPACITY, flushLevel=logging.ERROR, target=file_handler
+            )
+            buffered_handler.setLevel(log_level)
+            handlers.append(buffered_handler)
         except OSError as exc:
-            root_logger.error("Failed to setup file handler: %s", exc)
+            file_error = exc
 
+    # The root logger only enqueues records; console and file writes happen on
+    # the listener thread so blocking I/O never runs on the event loop
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    root_logger.addHandler(RecordQueueHandler(log_queue))
     root_logger.setLevel(log_level)
 
+    if file_error is not None:
+        root_logger.error("Failed to setup file handler: %s", file_error)
+
     # Reduce verbosity of external libraries
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("telegram").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("asyncio").setLevel(logging.WARNING)
 
+    _configured = True
+
 
 class StructuredLogger:
     """Wrapper for structured logging with context support."""
 
+    __slots__ = ("logger", "context", "_is_enabled_for")
+
     def __init__(self, name: str):
         self.logger = logging.getLogger(name)
         self.context: Dict[str, Any] = {}
+        # Bound once: checked on every call before any context dict is built
+        self._is_enabled_for = self.logger.isEnabledFor
 
     def set_context(self, **kwargs: Any) -> None:
         """Set context for all log messages."""
-        self.context.update(kwargs)
+        # Copy-on-write: records already emitted may share the previous dict
+        self.context = {**self.context, **kwargs}
 
     def clear_context(self) -> None:
         """Clear all context."""
@@ -102,8 +237,18 @@ class StructuredLogger:
 
     def _log(self, level: int, message: str, **kwargs: Any) -> None:
         """Internal log method with context."""
-        extra = {"context": {**self.context, **kwargs}}
-        self.logger.log(level, message, extra=extra)
+        if not self._is_enabled_for(level):
+            return
+        # Merge only when both sides are non-empty. Without kwargs the context dict
+        # is shared with the record (set_context replaces it rather than mutating);
+        # without context the per-call kwargs dict is used as is
+        if not kwargs:
+            context = self.context
+        elif not self.context:
+            context = kwargs
+        else:
+            context = {**self.context, **kwargs}
+        self.logger.log(level, message, extra={"context": context})
 
     def debug(self, message: str, **kwargs: Any) -> None:
         """Log debug message."""
@@ -127,10 +272,17 @@ class StructuredLogger:
 
     def exception(self, message: str, **kwargs: Any) -> None:
         """Log exception with traceback."""
+        if not self._is_enabled_for(logging.ERROR):
+            return
         extra = {"context": {**self.context, **kwargs}}
         self.logger.exception(message, extra=extra)
 
 
+@cache
 def get_logger(name: str) -> StructuredLogger:
-    """Get a structured logger instance."""
+    """Get a structured logger instance.
+
+    Like logging.getLogger, one instance is returned per name, so context set
+    via set_context() is shared by every caller using that name.
+    """
     return StructuredLogger(name)
@@ -2,12 +2,37 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from datetime import datetime
-from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+import random
+import time
+import warnings
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.error import TelegramError
-from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+from telegram.ext import (
+    Application,
+    CommandHandler,
+    ContextTypes,
+    ExtBot,
+    MessageHandler,
+    filters,
+)
+from telegram.request import HTTPXRequest
+from telegram.warnings import PTBDeprecationWarning
 
 from config import TelegramConfig
 
@@ -18,48 +43,232 @@ logger = logging.getLogger(__name__)
 
 MAX_MESSAGE_LENGTH = 4096
 
+# Размер общего пула HTTP соединений с Telegram API
+CONNECTION_POOL_SIZE = 32
+
+# Лимиты исходящих запросов (в секунду): общий - с запасом от лимита Telegram
+# в 30 сообщений/с, для чата - около одного сообщения в секунду с коротким всплеском
+GLOBAL_RATE_LIMIT = 25
+CHAT_RATE_LIMIT = 1.0
+CHAT_BURST = 3
+
+# Типы обновлений, которые обрабатывает бот (только сообщения и команды)
+ALLOWED_UPDATES = ["message"]
+
+# Таймаут long polling getUpdates (секунды)
+POLLING_TIMEOUT = 20
+
+# Сколько последних сообщений помнит кеш содержимого для update_alert
+CONTENT_CACHE_SIZE = 1024
+
+# Верхние границы задержек между повторами при сетевых ошибках (секунды)
+_RETRY_DELAYS = (1, 2, 4)
+
+# Запас к паузе, которую Telegram требует в ответе 429
+RETRY_AFTER_MARGIN = 0.25
+
+# Фрагменты текста BadRequest, которые означают, что действие уже выполнено.
+# python-telegram-bot убирает префикс "Bad Request: " и делает первую букву
+# заглавной, поэтому сравнение идет по фрагменту без начала фразы
+_NOT_MODIFIED = "is not modified"
+_DELETE_NOT_FOUND = "to delete not found"
+
+# Подпись кнопки со ссылкой на событие в Zabbix
+_VIEW_BUTTON_TEXT = "🔗 Открыть в Zabbix"
+
+T = TypeVar("T")
+
+CommandCallback = Callable[[Update, ContextTypes.DEFAULT_TYPE], Coroutine[Any, Any, None]]
+CommandSpec = Tuple[str, CommandCallback, bool]
+
+_SEVERITY_LABELS: Dict[str, str] = {
+    "0": "🟢 Не классифицировано",
+    "1": "🔵 Информация",
+    "2": "🟡 Предупреждение",
+    "3": "🟠 Средняя",
+    "4": "🔴 Высокая",
+    "5": "🔥 Критическая",
+}
+
+# (иконка статуса, текст статуса, заголовок сообщения)
+_STATUS_RESOLVED = ("✅", "РЕШЕНО", "✅ <b>Zabbix алерт - РЕШЕНО</b>")
+_STATUS_ACKNOWLEDGED = ("🔕", "ПОДТВЕРЖДЕНО", "🔕 <b>Zabbix алерт - ПОДТВЕРЖДЕНО</b>")
+_STATUS_ACTIVE = ("🔴", "ПРОБЛЕМА", "🚨 <b>Zabbix алерт - АКТИВНО</b>")
+
+
+def _split_message(message: str) -> List[str]:
+    """Разбивает сообщение на части не длиннее MAX_MESSAGE_LENGTH.
+
+    Части режутся по последнему переводу строки в пределах лимита; проход
+    по индексам исходной строки не копирует остаток сообщения на каждом шаге.
+    """
+    parts: List[str] = []
+    start = 0
+    length = len(message)
+    while start < length:
+        if length - start <= MAX_MESSAGE_LENGTH:
+            parts.append(message[start:])
+            break
+
+        end = message.rfind("\n", start, start + MAX_MESSAGE_LENGTH)
+        if end <= start:
+            end = start + MAX_MESSAGE_LENGTH
+
+        parts.append(message[start:end])
+
+        # Пропускаем пробельные символы в начале следующей части
+        start = end
+        while start < length and message[start].isspace():
+            start += 1
+
+    return parts
+
+
+def _retry_after_seconds(exc: RetryAfter) -> float:
+    """Возвращает паузу из RetryAfter в секундах (int или timedelta в зависимости от версии PTB)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", PTBDeprecationWarning)
+        retry_after = exc.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class RateLimiter:
+    """Ограничитель частоты запросов (token bucket).
+
+    Допускает не более rate вызовов в секунду с запасом burst. Ожидающие
+    проходят по очереди под asyncio.Lock, отмена ожидания освобождает блокировку.
+    """
+
+    __slots__ = ("rate", "burst", "_tokens", "_updated", "_lock")
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Ждет свободный слот и занимает его."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@lru_cache(maxsize=4096)
+def _format_timestamp(timestamp: int) -> str:
+    """Форматирует unix-время в локальное время без создания datetime.
+
+    Одно и то же событие форматируется при каждом обновлении сообщения,
+    поэтому результат кешируется.
+    """
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+@lru_cache(maxsize=8)
+def _event_url_prefix(zabbix_url: str) -> str:
+    """Возвращает начало ссылки на событие; URL Zabbix постоянен, строка строится один раз."""
+    return zabbix_url.rstrip("/") + "/zabbix.php?action=problem.view&filter_eventids[]="
+
+
+@lru_cache(maxsize=1024)
+def _build_keyboard(zabbix_url: str, event_id: str) -> InlineKeyboardMarkup:
+    """Создает клавиатуру со ссылкой на событие в Zabbix.
+
+    Объекты telegram неизменяемы, поэтому разметка переиспользуется
+    при повторном форматировании того же события (update_alert).
+    """
+    zabbix_event_url = _event_url_prefix(zabbix_url) + event_id
+    return InlineKeyboardMarkup([[InlineKeyboardButton(_VIEW_BUTTON_TEXT, url=zabbix_event_url)]])
+
 
 class TelegramBot:
     """Telegram бот для отправки уведомлений."""
 
     def __init__(self, config: TelegramConfig):
         self.config = config
-        self.bot = Bot(token=config.bot_token)
+        # Один пул соединений для отправки уведомлений и для Application:
+        # TLS соединения с api.telegram.org переиспользуются всеми вызовами
+        self._request = HTTPXRequest(
+            connection_pool_size=CONNECTION_POOL_SIZE,
+            read_timeout=20,
+            write_timeout=20,
+            connect_timeout=5,
+            pool_timeout=5,
+        )
+        # Отдельное соединение для getUpdates, чтобы long polling не занимал общий пул
+        self._get_updates_request = HTTPXRequest(connection_pool_size=1)
+        # Единственный экземпляр бота: его же использует Application, поэтому
+        # уведомления, ответы на команды и getUpdates идут через одни пулы
+        self.bot: Bot = ExtBot(
+            token=config.bot_token,
+            request=self._request,
+            get_updates_request=self._get_updates_request,
+        )
         self.application: Optional[Application] = None
         self.alert_monitor: Optional[AlertMonitor] = None
 
+        # Фильтры авторизации: целевой пользователь не меняется, создаем один раз
+        self._auth_filter = filters.User(user_id=config.target_chat_id)
+        self._auth_text_filter = filters.TEXT & ~filters.COMMAND & self._auth_filter
+
+        # Ограничения Telegram: ~30 сообщений/с на бота и ~1 сообщение/с в чат
+        self._global_limiter = RateLimiter(GLOBAL_RATE_LIMIT, GLOBAL_RATE_LIMIT)
+        self._chat_limiters: Dict[int, RateLimiter] = {}
+
+        # Хеши последнего отправленного содержимого по message_id (LRU)
+        self._content_hashes: OrderedDict[int, int] = OrderedDict()
+
+        # (команда, обработчик, требуется ли авторизация); /start отвечает всем
+        self._command_specs: Tuple[CommandSpec, ...] = (
+            ("start", self._start_command, False),
+            ("help", self._help_command, True),
+            ("status", self._status_command, True),
+            ("problems", self._problems_command, True),
+            ("test", self._test_command, True),
+        )
+
+    async def _throttle(self, chat_id: int) -> None:
+        """Ждет разрешения на запрос к Telegram: общий лимит и лимит чата."""
+        await self._global_limiter.acquire()
+        chat_limiter = self._chat_limiters.get(chat_id)
+        if chat_limiter is None:
+            chat_limiter = self._chat_limiters[chat_id] = RateLimiter(CHAT_RATE_LIMIT, CHAT_BURST)
+        await chat_limiter.acquire()
+
     def set_alert_monitor(self, alert_monitor: AlertMonitor) -> None:
         """Устанавливает ссылку на alert_monitor."""
         self.alert_monitor = alert_monitor
 
-    def _authorized_user_filter(self) -> filters.User:
-        """Создает фильтр для проверки авторизованного пользователя."""
-        return filters.User(user_id=self.config.target_chat_id)
-
     async def initialize(self) -> None:
         """Инициализация бота."""
         try:
-            application = Application.builder().token(self.config.bot_token).build()
+            application = Application.builder().bot(self.bot).build()
             self.application = application
 
-            # Фильтр для проверки авторизации
-            auth_filter = self._authorized_user_filter()
-
-            # Добавляем обработчики команд с фильтром авторизации
-            application.add_handler(CommandHandler("start", self._start_command))
-            application.add_handler(CommandHandler("help", self._help_command, filters=auth_filter))
-            application.add_handler(
-                CommandHandler("status", self._status_command, filters=auth_filter)
-            )
-            application.add_handler(
-                CommandHandler("problems", self._problems_command, filters=auth_filter)
-            )
-            application.add_handler(CommandHandler("test", self._test_command, filters=auth_filter))
+            # Добавляем обработчики команд с фильтром авторизации. block=False:
+            # обработчик выполняется отдельной задачей, и медленный запрос к Zabbix
+            # (/status, /problems) не задерживает обработку следующих обновлений
+            for command, callback, requires_auth in self._command_specs:
+                application.add_handler(
+                    CommandHandler(
+                        command,
+                        callback,
+                        filters=self._auth_filter if requires_auth else None,
+                        block=False,
+                    )
+                )
 
             # Обработчик неизвестных команд (только для авторизованного пользователя)
-            application.add_handler(
-                MessageHandler(filters.TEXT & ~filters.COMMAND & auth_filter, self._unknown_message)
-            )
+            application.add_handler(MessageHandler(self._auth_text_filter, self._unknown_message))
 
             logger.info("Telegram бот успешно инициализирован")
 
@@ -83,8 +292,25 @@ class TelegramBot:
             if application.updater is None:
                 raise RuntimeError("Updater не настроен для Telegram приложения")
 
-            await application.updater.start_polling()
-            logger.info("Telegram бот запущен и опрашивает обновления")
+            if self.config.webhook_url:
+                # Telegram сам доставляет обновления, без постоянных запросов getUpdates.
+                # Токен в пути скрывает адрес webhook от посторонних
+                await application.updater.start_webhook(
+                    listen=self.config.webhook_listen,
+                    port=self.config.webhook_port,
+                    url_path=self.config.bot_token,
+                    webhook_url=f"{self.config.webhook_url.rstrip('/')}/{self.config.bot_token}",
+                    secret_token=self.config.webhook_secret_token,
+                    allowed_updates=ALLOWED_UPDATES,
+                )
+                logger.info("Telegram бот запущен и принимает обновления через webhook")
+            else:
+                # Long polling с максимальным таймаутом: пока обновлений нет,
+                # запрос висит на стороне Telegram, а не повторяется
+                await application.updater.start_polling(
+                    timeout=POLLING_TIMEOUT, allowed_updates=ALLOWED_UPDATES
+                )
+                logger.info("Telegram бот запущен и опрашивает обновления")
 
         except Exception as exc:
             logger.error("Не удалось запустить Telegram бот: %s", exc)
@@ -92,16 +318,18 @@ class TelegramBot:
 
     async def stop(self) -> None:
         """Остановка бота."""
-        if self.application is None:
-            return
-
-        application = self.application
         try:
-            if application.updater is not None:
-                await application.updater.stop()
-            await application.stop()
-            await application.shutdown()
-            logger.info("Telegram бот остановлен")
+            if self.application is not None:
+                application = self.application
+                if application.updater is not None:
+                    await application.updater.stop()
+                await application.stop()
+                await application.shutdown()
+                logger.info("Telegram бот остановлен")
+
+            # Закрываем пулы соединений (повторное закрытие безопасно)
+            await self._request.shutdown()
+            await self._get_updates_request.shutdown()
         except Exception as exc:
             logger.error("Ошибка остановки Telegram бота: %s", exc)
 
@@ -113,48 +341,79 @@ class TelegramBot:
         retry_count: int = 3,
     ) -> Optional[int]:
         """Отправляет сообщение целевому пользователю с retry механизмом."""
-        for attempt in range(retry_count):
-            try:
-                # Если сообщение слишком длинное, разбиваем его
-                if len(message) > MAX_MESSAGE_LENGTH:
-                    logger.warning(
-                        "Сообщение слишком длинное (%s символов), разбиваем...", len(message)
-                    )
-                    return await self._send_long_message(
-                        message, parse_mode=parse_mode, reply_markup=reply_markup
-                    )
 
-                sent_message = await self.bot.send_message(
-                    chat_id=self.config.target_chat_id,
-                    text=message,
-                    parse_mode=parse_mode or self.config.parse_mode,
-                    reply_markup=reply_markup,
-                    disable_web_page_preview=True,
+        async def send() -> Optional[int]:
+            # Если сообщение слишком длинное, разбиваем его
+            if len(message) > MAX_MESSAGE_LENGTH:
+                logger.warning(
+                    "Сообщение слишком длинное (%s символов), разбиваем...", len(message)
                 )
-                sent_message_id = sent_message.message_id
-                logger.debug(
-                    "Message sent to chat %s (message_id: %s)",
-                    self.config.target_chat_id,
-                    sent_message_id,
+                return await self._send_long_message(
+                    message, parse_mode=parse_mode, reply_markup=reply_markup
                 )
-                return sent_message_id
 
-            except TelegramError as exc:
+            await self._throttle(self.config.target_chat_id)
+            sent_message = await self.bot.send_message(
+                chat_id=self.config.target_chat_id,
+                text=message,
+                parse_mode=parse_mode or self.config.parse_mode,
+                reply_markup=reply_markup,
+                disable_web_page_preview=True,
+            )
+            sent_message_id = sent_message.message_id
+            logger.debug(
+                "Message sent to chat %s (message_id: %s)",
+                self.config.target_chat_id,
+                sent_message_id,
+            )
+            return sent_message_id
+
+        return await self._retry_call(send, "отправить сообщение", retry_count)
+
+    async def _retry_call(
+        self, make_call: Callable[[], Awaitable[T]], action: str, retry_count: int
+    ) -> Optional[T]:
+        """Выполняет вызов Telegram API с повторами.
+
+        429 (RetryAfter) повторяется через указанное Telegram время, сетевые ошибки -
+        с экспоненциальной задержкой со случайным разбросом. Остальные ошибки
+        (BadRequest, Forbidden и т.п.) повтором не исправить, они не повторяются.
+        Возвращает результат вызова или None, если вызов не удался.
+        """
+        for attempt in range(retry_count):
+            try:
+                return await make_call()
+
+            except RetryAfter as exc:
+                if attempt >= retry_count - 1:
+                    logger.error("Не удалось %s после %s попыток: %s", action, retry_count, exc)
+                    break
+                wait_time = _retry_after_seconds(exc) + RETRY_AFTER_MARGIN
+                logger.warning("Telegram ограничил запросы, %s через %ss", action, wait_time)
+                await asyncio.sleep(wait_time)
+
+            except BadRequest as exc:
+                # BadRequest наследует NetworkError, но повтор его не исправит
+                logger.error("Не удалось %s: %s", action, exc)
+                break
+
+            except NetworkError as exc:
                 if attempt < retry_count - 1:
-                    wait_time = 2**attempt  # Exponential backoff: 1s, 2s, 4s
+                    max_delay = (
+                        _RETRY_DELAYS[attempt] if attempt < len(_RETRY_DELAYS) else 2**attempt
+                    )
+                    wait_time = random.uniform(0, max_delay)
                     logger.warning(
-                        "Не удалось отправить сообщение (попытка %s/%s): %s",
-                        attempt + 1,
-                        retry_count,
-                        exc,
+                        "Не удалось %s (попытка %s/%s): %s", action, attempt + 1, retry_count, exc
                     )
-                    logger.info("Повтор через %ss...", wait_time)
+                    logger.info("Повтор через %.1fs...", wait_time)
                     await asyncio.sleep(wait_time)
                 else:
-                    logger.error(
-                        "Не удалось отправить сообщение после %s попыток: %s", retry_count, exc
-                    )
-                    return None
+                    logger.error("Не удалось %s после %s попыток: %s", action, retry_count, exc)
+
+            except TelegramError as exc:
+                logger.error("Не удалось %s: %s", action, exc)
+                break
 
         return None
 
@@ -165,25 +424,13 @@ class TelegramBot:
         reply_markup: Optional[InlineKeyboardMarkup],
     ) -> Optional[int]:
         """Разбивает длинное сообщение на части и отправляет его."""
-        parts: list[str] = []
-        msg_copy = message
-        while msg_copy:
-            if len(msg_copy) <= MAX_MESSAGE_LENGTH:
-                parts.append(msg_copy)
-                break
-
-            split_pos = msg_copy.rfind("\n", 0, MAX_MESSAGE_LENGTH)
-            if split_pos == -1:
-                split_pos = MAX_MESSAGE_LENGTH
-
-            parts.append(msg_copy[:split_pos])
-            msg_copy = msg_copy[split_pos:].lstrip()
-
+        parts = _split_message(message)
         last_message_id: Optional[int] = None
         total_parts = len(parts)
         for index, part in enumerate(parts, 1):
             header = f"📄 Часть {index}/{total_parts}\n\n" if total_parts > 1 else ""
             part_markup = reply_markup if index == total_parts else None
+            await self._throttle(self.config.target_chat_id)
             sent_message = await self.bot.send_message(
                 chat_id=self.config.target_chat_id,
                 text=header + part,
@@ -207,8 +454,10 @@ class TelegramBot:
         retry_count: int = 3,
     ) -> bool:
         """Редактирует существующее сообщение."""
-        for attempt in range(retry_count):
+
+        async def edit() -> bool:
             try:
+                await self._throttle(self.config.target_chat_id)
                 await self.bot.edit_message_text(
                     chat_id=self.config.target_chat_id,
                     message_id=message_id,
@@ -217,68 +466,46 @@ class TelegramBot:
                     reply_markup=reply_markup,
                     disable_web_page_preview=True,
                 )
-                logger.debug("Сообщение %s успешно отредактировано", message_id)
-                return True
-
             except TelegramError as exc:
-                if "message is not modified" in str(exc).lower():
-                    logger.debug(
-                        "Содержимое сообщения %s не изменилось, пропуск редактирования", message_id
-                    )
-                    return True
+                if not (isinstance(exc, BadRequest) and _NOT_MODIFIED in exc.message):
+                    raise
+                logger.debug(
+                    "Содержимое сообщения %s не изменилось, пропуск редактирования", message_id
+                )
+                return True
 
-                if attempt < retry_count - 1:
-                    wait_time = 2**attempt
-                    logger.warning(
-                        "Не удалось отредактировать сообщение (попытка %s/%s): %s",
-                        attempt + 1,
-                        retry_count,
-                        exc,
-                    )
-                    logger.info("Повтор через %ss...", wait_time)
-                    await asyncio.sleep(wait_time)
-                else:
-                    logger.error(
-                        "Не удалось отредактировать сообщение после %s попыток: %s",
-                        retry_count,
-                        exc,
-                    )
-                    return False
+            logger.debug("Сообщение %s успешно отредактировано", message_id)
+            return True
 
-        return False
+        return bool(await self._retry_call(edit, "отредактировать сообщение", retry_count))
 
     async def delete_message(self, message_id: int, retry_count: int = 3) -> bool:
         """Удаляет сообщение."""
-        for attempt in range(retry_count):
+
+        async def delete() -> bool:
             try:
+                await self._throttle(self.config.target_chat_id)
                 await self.bot.delete_message(
                     chat_id=self.config.target_chat_id, message_id=message_id
                 )
-                logger.debug("Сообщение %s успешно удалено", message_id)
+            except TelegramError as exc:
+                if not (isinstance(exc, BadRequest) and _DELETE_NOT_FOUND in exc.message):
+                    raise
+                logger.debug("Сообщение %s уже удалено или не найдено", message_id)
                 return True
 
-            except TelegramError as exc:
-                if "message to delete not found" in str(exc).lower():
-                    logger.debug("Сообщение %s уже удалено или не найдено", message_id)
-                    return True
+            logger.debug("Сообщение %s успешно удалено", message_id)
+            return True
 
-                if attempt < retry_count - 1:
-                    wait_time = 2**attempt
-                    logger.warning(
-                        "Не удалось удалить сообщение (попытка %s/%s): %s",
-                        attempt + 1,
-                        retry_count,
-                        exc,
-                    )
-                    logger.info("Повтор через %ss...", wait_time)
-                    await asyncio.sleep(wait_time)
-                else:
-                    logger.error(
-                        "Не удалось удалить сообщение после %s попыток: %s", retry_count, exc
-                    )
-                    return False
+        self._content_hashes.pop(message_id, None)
+        return bool(await self._retry_call(delete, "удалить сообщение", retry_count))
 
-        return False
+    def _remember_content(self, message_id: int, content_hash: int) -> None:
+        """Запоминает хеш содержимого сообщения, вытесняя самые старые записи."""
+        self._content_hashes[message_id] = content_hash
+        self._content_hashes.move_to_end(message_id)
+        if len(self._content_hashes) > CONTENT_CACHE_SIZE:
+            self._content_hashes.popitem(last=False)
 
     async def send_alert(
         self, alert_data: Dict[str, Any], zabbix_url: Optional[str] = None
@@ -286,7 +513,10 @@ class TelegramBot:
         """Отправляет форматированное уведомление об алерте."""
         try:
             message, reply_markup = self._format_alert_message(alert_data, zabbix_url)
-            return await self.send_message(message, reply_markup=reply_markup)
+            message_id = await self.send_message(message, reply_markup=reply_markup)
+            if message_id is not None:
+                self._remember_content(message_id, hash((message, zabbix_url)))
+            return message_id
 
         except Exception as exc:
             logger.error("Не удалось отправить алерт: %s", exc)
@@ -298,7 +528,18 @@ class TelegramBot:
         """Обновляет существующее сообщение об алерте."""
         try:
             message, reply_markup = self._format_alert_message(alert_data, zabbix_url)
-            return await self.edit_message(message_id, message, reply_markup=reply_markup)
+
+            # Содержимое не изменилось - не тратим запрос, который Telegram
+            # все равно отклонит с "message is not modified"
+            content_hash = hash((message, zabbix_url))
+            if self._content_hashes.get(message_id) == content_hash:
+                logger.debug("Алерт %s не изменился, редактирование пропущено", message_id)
+                return True
+
+            success = await self.edit_message(message_id, message, reply_markup=reply_markup)
+            if success:
+                self._remember_content(message_id, content_hash)
+            return success
 
         except Exception as exc:
             logger.error("Не удалось обновить алерт: %s", exc)
@@ -312,16 +553,7 @@ class TelegramBot:
         trigger = alert_data.get("trigger", {})
         hosts = alert_data.get("hosts", [])
 
-        severity_map = {
-            "0": "🟢 Не классифицировано",
-            "1": "🔵 Информация",
-            "2": "🟡 Предупреждение",
-            "3": "🟠 Средняя",
-            "4": "🔴 Высокая",
-            "5": "🔥 Критическая",
-        }
-
-        severity = severity_map.get(problem.get("severity", "0"), "❓ Неизвестно")
+        severity = _SEVERITY_LABELS.get(problem.get("severity", "0"), "❓ Неизвестно")
 
         host_name = hosts[0]["name"] if hosts else "Неизвестный хост"
         host_ip = ""
@@ -336,76 +568,57 @@ class TelegramBot:
         event_time = problem.get("clock", "")
         if event_time:
             try:
-                event_time = datetime.fromtimestamp(int(event_time)).strftime("%Y-%m-%d %H:%M:%S")
+                event_time = _format_timestamp(int(event_time))
             except (TypeError, ValueError):
                 event_time = "Неизвестно"
 
         is_resolved = problem.get("r_eventid", "0") != "0"
         acknowledged = problem.get("acknowledged", "0") == "1"
 
-        if is_resolved:
-            status_icon = "✅"
-            status_text = "РЕШЕНО"
-            alert_header = "✅ <b>Zabbix алерт - РЕШЕНО</b>"
-        elif acknowledged:
-            status_icon = "🔕"
-            status_text = "ПОДТВЕРЖДЕНО"
-            alert_header = "🔕 <b>Zabbix алерт - ПОДТВЕРЖДЕНО</b>"
-        else:
-            status_icon = "🔴"
-            status_text = "ПРОБЛЕМА"
-            alert_header = "🚨 <b>Zabbix алерт - АКТИВНО</b>"
-
-        message = f"""
-{alert_header}
-
-{severity}
-<b>Хост:</b> {host_name}{host_ip}
-<b>Проблема:</b> {problem_name}
-<b>Описание:</b> {trigger_description}
-<b>Время:</b> {event_time}
-<b>ID события:</b> {problem.get("eventid", "N/A")}
+        status_icon, status_text, alert_header = (
+            _STATUS_RESOLVED
+            if is_resolved
+            else _STATUS_ACKNOWLEDGED if acknowledged else _STATUS_ACTIVE
+        )
 
-<b>Статус:</b> {status_icon} {status_text}
-        """.strip()
+        parts = [
+            alert_header,
+            "",
+            severity,
+            f"<b>Хост:</b> {host_name}{host_ip}",
+            f"<b>Проблема:</b> {problem_name}",
+            f"<b>Описание:</b> {trigger_description}",
+            f"<b>Время:</b> {event_time}",
+            f"<b>ID события:</b> {problem.get('eventid', 'N/A')}",
+            "",
+            f"<b>Статус:</b> {status_icon} {status_text}",
+        ]
 
         if is_resolved and problem.get("r_clock"):
             try:
-                resolved_time = datetime.fromtimestamp(int(problem.get("r_clock"))).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )
-                message += f"\n<b>Решено в:</b> {resolved_time}"
+                resolved_time = _format_timestamp(int(problem.get("r_clock")))
+                parts.append(f"<b>Решено в:</b> {resolved_time}")
             except (TypeError, ValueError):
                 logger.debug("Не удалось преобразовать время решения проблемы", exc_info=True)
 
         if problem.get("tags"):
-            tags = []
-            for tag in problem["tags"]:
-                tag_key = tag.get("tag", "")
-                tag_value = tag.get("value", "")
-                if tag_key:
-                    if tag_value:
-                        tags.append(f"{tag_key}:{tag_value}")
-                    else:
-                        tags.append(tag_key)
+            tags = [
+                f"{tag['tag']}:{tag['value']}" if tag.get("value") else tag["tag"]
+                for tag in problem["tags"]
+                if tag.get("tag")
+            ]
 
             if tags:
-                message += f"\n<b>Теги:</b> {', '.join(tags)}"
+                parts.append(f"<b>Теги:</b> {', '.join(tags)}")
 
         if trigger.get("comments"):
-            message += f"\n<b>Комментарии:</b> {trigger['comments']}"
-
-        keyboard: list[list[InlineKeyboardButton]] = []
-        if zabbix_url and problem.get("eventid"):
-            event_id = problem.get("eventid")
-            zabbix_event_url = (
-                f"{zabbix_url.rstrip('/')}/zabbix.php?action=problem.view&filter_eventids[]="
-                f"{event_id}"
-            )
-            keyboard.append([InlineKeyboardButton("🔗 Открыть в Zabbix", url=zabbix_event_url)])
+            parts.append(f"<b>Комментарии:</b> {trigger['comments']}")
 
-        reply_markup = InlineKeyboardMarkup(keyboard) if keyboard else None
-        return message, reply_markup
+        event_id = problem.get("eventid")
+        reply_markup = (
+            _build_keyboard(zabbix_url, str(event_id)) if zabbix_url and event_id else None
+        )
+        return "\n".join(parts), reply_markup
 
     async def _start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик команды /start."""
@@ -467,7 +680,7 @@ class TelegramBot:
                 "eventid": "12345",
                 "name": "Тестовая проблема",
                 "severity": "3",
-                "clock": str(int(asyncio.get_event_loop().time())),
+                "clock": str(int(time.time())),
                 "r_eventid": "0",
                 "tags": [{"tag": "тест", "value": "алерт"}],
             },
@@ -1,21 +1,26 @@
 """Tests for alert_monitor module."""
 
 import asyncio
+import threading
+import time
+from dataclasses import replace
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from alert_monitor import AlertMonitor
+from alert_monitor import SENT_ALERTS_MAXSIZE, SENT_ALERTS_TTL, AlertMonitor
+
+_real_zbx = AlertMonitor._zbx
 
 
 @pytest.fixture(autouse=True)
-def immediate_to_thread(monkeypatch):
+def immediate_zbx(monkeypatch):
     """Ensure background calls execute quickly during tests."""
 
-    async def _direct(func, *args, **kwargs):
+    async def _direct(self, func, *args, **kwargs):
         return func(*args, **kwargs)
 
-    monkeypatch.setattr(asyncio, "to_thread", _direct)
+    monkeypatch.setattr(AlertMonitor, "_zbx", _direct)
 
 
 class TestAlertMonitor:
@@ -34,6 +39,13 @@ class TestAlertMonitor:
         assert monitor.sent_alerts == {}
         assert monitor.is_running is False
 
+    def test_sent_alerts_bounded_by_ttl(self, app_config):
+        """Test that tracked alerts expire via TTL cache."""
+        monitor = AlertMonitor(app_config, MagicMock(), MagicMock())
+
+        assert monitor.sent_alerts.ttl == SENT_ALERTS_TTL
+        assert monitor.sent_alerts.maxsize == SENT_ALERTS_MAXSIZE
+
     @pytest.mark.asyncio
     async def test_process_problem(self, app_config, mock_problem, mock_problem_details):
         """Test processing a single problem."""
@@ -50,7 +62,7 @@ class TestAlertMonitor:
         assert "12345" in monitor.sent_alerts
         assert monitor.sent_alerts["12345"]["message_id"] == 123
         assert monitor.sent_alerts["12345"]["status"] == "problem"
-        assert monitor.stats["alerts_sent"] == 1
+        assert monitor.stats.alerts_sent == 1
 
     @pytest.mark.asyncio
     async def test_process_problem_failure(self, app_config, mock_problem, mock_problem_details):
@@ -67,6 +79,21 @@ class TestAlertMonitor:
 
         assert "12345" not in monitor.sent_alerts
         assert len(monitor.failed_alerts) == 1
+        failed = monitor.failed_alerts[0]
+        assert failed["next_retry_at"] >= failed["timestamp"] + 2
+
+    @pytest.mark.asyncio
+    async def test_process_problem_skips_details_for_filtered(self, app_config, mock_problem):
+        """Test that low-severity problems are rejected before fetching details."""
+        mock_zabbix = MagicMock()
+        mock_telegram = AsyncMock()
+
+        monitor = AlertMonitor(app_config, mock_zabbix, mock_telegram)
+
+        await monitor._process_problem({**mock_problem, "severity": "1"})
+
+        mock_zabbix.get_problem_details.assert_not_called()
+        mock_telegram.send_alert.assert_not_called()
 
     def test_should_send_alert_severity_filter(self, app_config, mock_problem_details):
         """Test alert filtering by severity."""
@@ -113,7 +140,48 @@ class TestAlertMonitor:
 
         await monitor._check_for_alerts()
 
-        assert monitor.stats["problems_found"] > 0
+        assert monitor.stats.problems_found > 0
+        assert mock_zabbix.get_problems.call_args.kwargs["time_from"] == 1
+
+    @pytest.mark.asyncio
+    async def test_check_for_alerts_processes_problems_concurrently(self, app_config, mock_problem):
+        """Test that all new problems are dispatched and sent."""
+        problems = [{**mock_problem, "eventid": str(event_id)} for event_id in range(1, 4)]
+
+        mock_zabbix = MagicMock()
+        mock_zabbix.get_problems = MagicMock(return_value=problems)
+        mock_zabbix.get_problem_details = MagicMock(
+            side_effect=lambda problem: {"problem": problem, "trigger": {}, "hosts": []}
+        )
+
+        mock_telegram = AsyncMock()
+        mock_telegram.send_alert = AsyncMock(side_effect=[101, 102, 103])
+
+        monitor = AlertMonitor(app_config, mock_zabbix, mock_telegram)
+        monitor.last_check_time = 0
+
+        await monitor._check_for_alerts()
+
+        assert set(monitor.sent_alerts) == {"1", "2", "3"}
+        assert monitor.stats.alerts_sent == 3
+
+    @pytest.mark.asyncio
+    async def test_check_for_alerts_skips_duplicate_events(self, app_config, mock_problem):
+        """Test that a repeated eventid in one response is sent only once."""
+        mock_zabbix = MagicMock()
+        mock_zabbix.get_problems = MagicMock(return_value=[mock_problem, dict(mock_problem)])
+        mock_zabbix.get_problem_details = MagicMock(
+            side_effect=lambda problem: {"problem": problem, "trigger": {}, "hosts": []}
+        )
+
+        mock_telegram = AsyncMock()
+        mock_telegram.send_alert = AsyncMock(return_value=101)
+
+        monitor = AlertMonitor(app_config, mock_zabbix, mock_telegram)
+        monitor.last_check_time = 0
+
+        assert await monitor._check_for_alerts() == 1
+        mock_telegram.send_alert.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_check_for_status_updates(self, app_config, mock_problem):
@@ -153,14 +221,13 @@ class TestAlertMonitor:
         mock_telegram = AsyncMock()
         mock_telegram.delete_message = AsyncMock(return_value=True)
 
-        app_config.delete_resolved_after = 1  # 1 second
-        app_config.mark_resolved = False  # Enable deletion
+        app_config = replace(
+            app_config, delete_resolved_after=1, mark_resolved=False  # Enable deletion
+        )
 
         monitor = AlertMonitor(app_config, mock_zabbix, mock_telegram)
 
         # Add resolved alert from the past
-        import time
-
         monitor.sent_alerts["12345"] = {
             "message_id": 123,
             "timestamp": time.time(),
@@ -180,13 +247,12 @@ class TestAlertMonitor:
         mock_zabbix = MagicMock()
         mock_telegram = AsyncMock()
 
-        app_config.delete_resolved_after = 1
-        app_config.mark_resolved = True  # Don't delete, just mark
+        app_config = replace(
+            app_config, delete_resolved_after=1, mark_resolved=True  # Don't delete, just mark
+        )
 
         monitor = AlertMonitor(app_config, mock_zabbix, mock_telegram)
 
-        import time
-
         monitor.sent_alerts["12345"] = {
             "message_id": 123,
             "timestamp": time.time(),
@@ -248,6 +314,84 @@ class TestAlertMonitor:
         assert len(monitor.failed_alerts) == 0
         assert "12345" not in monitor.sent_alerts
 
+    @pytest.mark.asyncio
+    async def test_retry_failed_alerts_respects_backoff(self, app_config, mock_problem_details):
+        """Test that alerts are retried only after their backoff deadline."""
+        mock_zabbix = MagicMock()
+        mock_telegram = AsyncMock()
+        mock_telegram.send_alert = AsyncMock(return_value=None)
+
+        monitor = AlertMonitor(app_config, mock_zabbix, mock_telegram)
+        monitor.failed_alerts.append(
+            {
+                "problem_details": mock_problem_details,
+                "timestamp": time.time(),
+                "attempts": 1,
+                "next_retry_at": time.time() + 60,
+            }
+        )
+
+        await monitor._retry_failed_alerts()
+
+        mock_telegram.send_alert.assert_not_called()
+        assert len(monitor.failed_alerts) == 1
+
+        # Срок повтора наступил - отправка снова неудачна, задержка растет
+        monitor.failed_alerts[0]["next_retry_at"] = 0
+        before = time.time()
+
+        await monitor._retry_failed_alerts()
+
+        mock_telegram.send_alert.assert_called_once()
+        assert monitor.failed_alerts[0]["attempts"] == 2
+        assert monitor.failed_alerts[0]["next_retry_at"] >= before + 4
+
+    @pytest.mark.asyncio
+    async def test_retry_failed_alerts_uses_time_after_send(self, app_config, mock_problem_details):
+        """Test that sent timestamps and retry deadlines are taken after a slow send."""
+
+        async def slow_send(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return None
+
+        mock_telegram = AsyncMock()
+        mock_telegram.send_alert = slow_send
+        monitor = AlertMonitor(app_config, MagicMock(), mock_telegram)
+        monitor.failed_alerts.append(
+            {"problem_details": mock_problem_details, "timestamp": 1000, "attempts": 1}
+        )
+
+        before = time.time()
+        await monitor._retry_failed_alerts()
+
+        assert monitor.failed_alerts[0]["next_retry_at"] >= before + 0.05 + 4
+
+        async def slow_success(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return 456
+
+        mock_telegram.send_alert = slow_success
+        monitor.failed_alerts[0]["next_retry_at"] = 0
+        before = time.time()
+        await monitor._retry_failed_alerts()
+
+        assert monitor.sent_alerts["12345"]["timestamp"] >= before + 0.05
+
+    def test_failed_alert_queue_overflow_is_logged(
+        self, app_config, mock_problem_details, monkeypatch, caplog
+    ):
+        """Test that evicting the oldest failed alert from a full queue is logged."""
+        monkeypatch.setattr("alert_monitor.MAX_RETRY_QUEUE", 2)
+        monitor = AlertMonitor(app_config, MagicMock(), MagicMock())
+        for attempts in range(1, 4):
+            monitor._enqueue_failed_alert(
+                {"problem_details": mock_problem_details, "timestamp": 0, "attempts": attempts}
+            )
+
+        assert [info["attempts"] for info in monitor.failed_alerts] == [2, 3]
+        assert "Очередь повтора заполнена" in caplog.text
+        assert caplog.text.count("Очередь повтора заполнена") == 1
+
     @pytest.mark.asyncio
     async def test_get_status(self, app_config):
         """Test getting monitor status."""
@@ -267,6 +411,15 @@ class TestAlertMonitor:
         status = await monitor.get_status()
 
         assert status["running"] is True
+        assert status["stats"] == {
+            "total_checks": 0,
+            "problems_found": 0,
+            "alerts_sent": 0,
+            "alerts_updated": 0,
+            "alerts_deleted": 0,
+            "errors": 0,
+            "last_error": None,
+        }
         assert "uptime_seconds" in status
         assert "uptime_str" in status
         assert status["telegram_connected"] is True
@@ -291,6 +444,200 @@ class TestAlertMonitor:
 
         mock_telegram.send_message.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_send_problems_list(self, app_config, mock_problem, mock_problem_details):
+        """Test sending the list of active problems."""
+        mock_zabbix = MagicMock()
+        mock_zabbix.get_problems = MagicMock(return_value=[mock_problem])
+        mock_zabbix.get_problem_details_batch = MagicMock(return_value=[mock_problem_details])
+
+        mock_telegram = AsyncMock()
+        mock_telegram.send_message = AsyncMock()
+
+        monitor = AlertMonitor(app_config, mock_zabbix, mock_telegram)
+
+        await monitor.send_problems_list()
+
+        message = mock_telegram.send_message.call_args[0][0]
+        assert "Активные проблемы (1)" in message
+        assert "1. 🟠 <b>High CPU usage</b>" in message
+        assert "Хост: web-server-01" in message
+
+    @pytest.mark.asyncio
+    async def test_zbx_runs_in_dedicated_executor(self, app_config):
+        """Test that Zabbix calls run in the monitor's own thread pool."""
+        monitor = AlertMonitor(app_config, MagicMock(), MagicMock())
+
+        thread_name = await _real_zbx(monitor, lambda: threading.current_thread().name)
+        executor = monitor._zbx_executor
+
+        assert thread_name.startswith("zbx")
+        assert await _real_zbx(monitor, lambda: 1) == 1
+        assert monitor._zbx_executor is executor
+
+        monitor.stop_monitoring()
+        assert monitor._zbx_executor is None
+        with pytest.raises(RuntimeError):
+            await _real_zbx(monitor, lambda: 1)
+        assert monitor._zbx_executor is None
+
+    @pytest.mark.asyncio
+    async def test_stop_monitoring_keeps_pool_for_inflight_iteration(self, app_config, monkeypatch):
+        """Test that the pool is closed when the loop exits, without a new pool leaking."""
+        monkeypatch.setattr(AlertMonitor, "_zbx", _real_zbx)
+        monitor = AlertMonitor(app_config, MagicMock(), AsyncMock())
+        executors = []
+
+        async def check_for_alerts():
+            await monitor._zbx(lambda: None)
+            executors.append(monitor._zbx_executor)
+            monitor.stop_monitoring()
+            # The iteration is still in flight and keeps using the same pool
+            await monitor._zbx(lambda: None)
+            executors.append(monitor._zbx_executor)
+            return 0
+
+        monkeypatch.setattr(monitor, "_check_for_alerts", check_for_alerts)
+        monkeypatch.setattr(monitor, "_retry_failed_alerts", AsyncMock())
+        monkeypatch.setattr(monitor, "_check_for_status_updates", AsyncMock())
+        monkeypatch.setattr(monitor, "_cleanup_resolved_alerts", AsyncMock())
+
+        await asyncio.wait_for(monitor.start_monitoring(), timeout=2)
+
+        assert executors[0] is not None
+        assert executors[1] is executors[0]
+        with pytest.raises(RuntimeError):
+            executors[0].submit(lambda: None)
+        assert monitor._zbx_executor is None
+        with pytest.raises(RuntimeError):
+            await monitor._zbx(lambda: None)
+
+    @pytest.mark.asyncio
+    async def test_stop_monitoring_interrupts_wait(self, app_config):
+        """Test that stop_monitoring wakes the poll loop immediately."""
+        mock_zabbix = MagicMock()
+        mock_zabbix.get_problems = MagicMock(return_value=[])
+        monitor = AlertMonitor(app_config, mock_zabbix, AsyncMock())
+
+        task = asyncio.create_task(monitor.start_monitoring())
+        while monitor.stats.total_checks == 0:
+            await asyncio.sleep(0)
+
+        monitor.stop_monitoring()
+        await asyncio.wait_for(task, timeout=1)
+
+        assert monitor.stats.total_checks == 1
+
+    @pytest.mark.asyncio
+    async def test_monitoring_checks_and_retries_concurrently(self, app_config, monkeypatch):
+        """Test that new alert check and retry run in the same iteration concurrently."""
+        monitor = AlertMonitor(app_config, MagicMock(), AsyncMock())
+        retry_started = asyncio.Event()
+
+        async def check_for_alerts():
+            # Only completes if the retry runs alongside the check
+            await asyncio.wait_for(retry_started.wait(), timeout=1)
+            monitor.stop_monitoring()
+            return 0
+
+        async def retry_failed_alerts():
+            retry_started.set()
+
+        monkeypatch.setattr(monitor, "_check_for_alerts", check_for_alerts)
+        monkeypatch.setattr(monitor, "_retry_failed_alerts", retry_failed_alerts)
+        monkeypatch.setattr(monitor, "_check_for_status_updates", AsyncMock())
+        monkeypatch.setattr(monitor, "_cleanup_resolved_alerts", AsyncMock())
+
+        await asyncio.wait_for(monitor.start_monitoring(), timeout=2)
+
+        assert monitor.stats.total_checks == 1
+        assert monitor.stats.errors == 0
+
+    @pytest.mark.asyncio
+    async def test_monitoring_waits_for_retry_when_check_fails(self, app_config, monkeypatch):
+        """Test that a failing check does not leave the retry pass running in background."""
+        monitor = AlertMonitor(app_config, MagicMock(), AsyncMock())
+        retry_finished = False
+
+        async def check_for_alerts():
+            monitor.stop_monitoring()
+            raise RuntimeError("check failed")
+
+        async def retry_failed_alerts():
+            nonlocal retry_finished
+            await asyncio.sleep(0.01)
+            retry_finished = True
+
+        monkeypatch.setattr(monitor, "_check_for_alerts", check_for_alerts)
+        monkeypatch.setattr(monitor, "_retry_failed_alerts", retry_failed_alerts)
+
+        await asyncio.wait_for(monitor.start_monitoring(), timeout=2)
+
+        assert retry_finished
+        assert monitor.stats.errors == 1
+        assert monitor.last_error == "check failed"
+
+    @pytest.mark.asyncio
+    async def test_monitoring_keeps_check_result_when_retry_fails(self, app_config, monkeypatch):
+        """Test that a failing retry pass does not discard the check result."""
+        monitor = AlertMonitor(app_config, MagicMock(), AsyncMock())
+
+        async def check_for_alerts():
+            monitor.stop_monitoring()
+            return 2
+
+        monkeypatch.setattr(monitor, "_check_for_alerts", check_for_alerts)
+        monkeypatch.setattr(
+            monitor, "_retry_failed_alerts", AsyncMock(side_effect=RuntimeError("retry failed"))
+        )
+        check_for_status_updates = AsyncMock()
+        monkeypatch.setattr(monitor, "_check_for_status_updates", check_for_status_updates)
+        monkeypatch.setattr(monitor, "_cleanup_resolved_alerts", AsyncMock())
+
+        await asyncio.wait_for(monitor.start_monitoring(), timeout=2)
+
+        assert monitor.stats.total_checks == 1
+        assert monitor.stats.errors == 1
+        assert monitor._current_interval == app_config.poll_interval / 2
+        check_for_status_updates.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_retry_failed_alerts_overlapping_passes(self, app_config, mock_problem_details):
+        """Test that overlapping retry passes stop on an emptied queue."""
+
+        async def send_alert(*args, **kwargs):
+            await asyncio.sleep(0)
+            return 456
+
+        mock_telegram = AsyncMock()
+        mock_telegram.send_alert = send_alert
+        monitor = AlertMonitor(app_config, MagicMock(), mock_telegram)
+        for _ in range(2):
+            monitor.failed_alerts.append(
+                {"problem_details": mock_problem_details, "timestamp": 1000, "attempts": 1}
+            )
+
+        await asyncio.gather(monitor._retry_failed_alerts(), monitor._retry_failed_alerts())
+
+        assert len(monitor.failed_alerts) == 0
+        assert monitor.stats.alerts_sent == 2
+
+    def test_adjust_poll_interval(self, app_config):
+        """Test adaptive poll interval bounds."""
+        monitor = AlertMonitor(app_config, MagicMock(), MagicMock())
+        assert monitor._current_interval == app_config.poll_interval
+
+        for _ in range(10):
+            monitor._adjust_poll_interval(3)
+        assert monitor._current_interval == 5
+
+        monitor._adjust_poll_interval(0)
+        assert monitor._current_interval == 10
+
+        for _ in range(10):
+            monitor._adjust_poll_interval(0)
+        assert monitor._current_interval == 60
+
     def test_stop_monitoring(self, app_config):
         """Test stopping monitor."""
         mock_zabbix = MagicMock()
@@ -55,10 +55,36 @@ class TestAppConfig:
         assert config.max_retries == 3
         assert config.min_severity == 2
 
+    def test_app_config_is_frozen(self, zabbix_config, telegram_config):
+        """Test that AppConfig cannot be mutated (it is cached by get_config)."""
+        from dataclasses import FrozenInstanceError
+
+        config = AppConfig(zabbix=zabbix_config, telegram=telegram_config)
+        with pytest.raises(FrozenInstanceError):
+            config.poll_interval = 30  # type: ignore[misc]
+        assert not hasattr(config, "__dict__")
+
 
 class TestGetConfig:
     """Tests for get_config function."""
 
+    @pytest.fixture(autouse=True)
+    def clear_config_cache(self):
+        """Re-read the environment in every test."""
+        get_config.cache_clear()
+        yield
+        get_config.cache_clear()
+
+    def test_get_config_is_cached(self, mock_env_vars, monkeypatch):
+        """Test that get_config parses the environment only once."""
+        config = get_config()
+        monkeypatch.setenv("POLL_INTERVAL", "120")
+
+        assert get_config() is config
+
+        get_config.cache_clear()
+        assert get_config().poll_interval == 120
+
     def test_get_config_with_api_token(self, mock_env_vars):
         """Test get_config with API token."""
         config = get_config()
@@ -111,12 +137,57 @@ class TestGetConfig:
         with pytest.raises(ValueError, match="Некорректный формат ZABBIX_URL"):
             get_config()
 
+    @pytest.mark.parametrize(
+        "url", ["https://", "http:///path", "https://?query", "zabbix.example.com/api"]
+    )
+    def test_get_config_url_without_host(self, mock_env_vars, monkeypatch, url):
+        """Test get_config rejects URLs without scheme or host."""
+        monkeypatch.setenv("ZABBIX_URL", url)
+        with pytest.raises(ValueError, match="Некорректный формат ZABBIX_URL"):
+            get_config()
+
+    def test_get_config_unsupported_url_scheme(self, mock_env_vars, monkeypatch):
+        """Test get_config rejects non-HTTP URL schemes."""
+        monkeypatch.setenv("ZABBIX_URL", "ftp://zabbix.example.com")
+        with pytest.raises(ValueError, match="http:// или https://"):
+            get_config()
+
+    def test_get_config_uppercase_url_scheme(self, mock_env_vars, monkeypatch):
+        """Test get_config accepts scheme in any case."""
+        monkeypatch.setenv("ZABBIX_URL", "HTTPS://zabbix.example.com")
+        assert get_config().zabbix.url == "HTTPS://zabbix.example.com"
+
     def test_get_config_invalid_poll_interval(self, mock_env_vars, monkeypatch):
         """Test get_config raises error for invalid POLL_INTERVAL."""
         monkeypatch.setenv("POLL_INTERVAL", "0")
         with pytest.raises(ValueError, match="POLL_INTERVAL должен быть больше 0"):
             get_config()
 
+    @pytest.mark.parametrize(
+        "name,value,message",
+        [
+            ("MAX_RETRIES", "-1", "MAX_RETRIES не может быть отрицательным"),
+            ("MIN_SEVERITY", "6", "MIN_SEVERITY должен быть в диапазоне 0-5"),
+            ("QUIET_HOURS_MIN_SEVERITY", "-1", "QUIET_HOURS_MIN_SEVERITY должен быть в диапазоне"),
+            ("RETRY_DELAY", "abc", "Некорректное значение RETRY_DELAY"),
+        ],
+    )
+    def test_get_config_invalid_int_values(self, mock_env_vars, monkeypatch, name, value, message):
+        """Test get_config validates integer parameters."""
+        monkeypatch.setenv(name, value)
+        with pytest.raises(ValueError, match=message):
+            get_config()
+
+    def test_get_config_host_lists(self, mock_env_vars, monkeypatch):
+        """Test parsing of comma-separated host filters."""
+        monkeypatch.setenv("HOST_GROUPS", " Linux servers , ,Databases,")
+        monkeypatch.setenv("EXCLUDED_HOSTS", " , ")
+
+        config = get_config()
+
+        assert config.host_groups == ["Linux servers", "Databases"]
+        assert config.excluded_hosts is None
+
     def test_get_config_invalid_chat_id(self, mock_env_vars, monkeypatch):
         """Test get_config raises error for invalid TELEGRAM_CHAT_ID."""
         monkeypatch.setenv("TELEGRAM_CHAT_ID", "not-a-number")
@@ -144,6 +215,37 @@ class TestGetConfig:
         assert config.retry_delay == 10
         assert config.min_severity == 4
 
+    def test_get_config_webhook(self, mock_env_vars, monkeypatch):
+        """Test webhook settings are parsed and polling stays the default."""
+        assert get_config().telegram.webhook_url is None
+
+        get_config.cache_clear()
+        monkeypatch.setenv("TELEGRAM_WEBHOOK_URL", "https://bot.example.com/hook")
+        monkeypatch.setenv("TELEGRAM_WEBHOOK_PORT", "8080")
+        monkeypatch.setenv("TELEGRAM_WEBHOOK_SECRET", "s3cret")
+
+        telegram = get_config().telegram
+        assert telegram.webhook_url == "https://bot.example.com/hook"
+        assert telegram.webhook_listen == "0.0.0.0"
+        assert telegram.webhook_port == 8080
+        assert telegram.webhook_secret_token == "s3cret"
+
+    def test_get_config_ignores_webhook_port_without_url(self, mock_env_vars, monkeypatch):
+        """Test a leftover webhook port does not break polling-only startup."""
+        monkeypatch.setenv("TELEGRAM_WEBHOOK_PORT", "not-a-port")
+        assert get_config().telegram.webhook_port == 8443
+
+        get_config.cache_clear()
+        monkeypatch.setenv("TELEGRAM_WEBHOOK_URL", "https://bot.example.com/hook")
+        with pytest.raises(ValueError, match="Некорректное значение TELEGRAM_WEBHOOK_PORT"):
+            get_config()
+
+    def test_get_config_webhook_requires_https(self, mock_env_vars, monkeypatch):
+        """Test get_config rejects a non-HTTPS webhook URL."""
+        monkeypatch.setenv("TELEGRAM_WEBHOOK_URL", "http://bot.example.com")
+        with pytest.raises(ValueError, match="TELEGRAM_WEBHOOK_URL должен начинаться с https://"):
+            get_config()
+
     def test_get_config_ssl_verify_false(self, mock_env_vars, monkeypatch):
         """Test get_config with SSL verification disabled."""
         monkeypatch.setenv("ZABBIX_SSL_VERIFY", "false")
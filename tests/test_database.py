@@ -1,5 +1,7 @@
 """Tests for the alert database module."""
 
+import asyncio
+import json
 import time
 from pathlib import Path
 
@@ -30,6 +32,7 @@ async def test_alert_database_crud_operations(tmp_path: Path) -> None:
     assert alert is not None
     assert alert["status"] == "problem"
     assert alert["hostname"] == "web-1"
+    assert json.loads(alert["metadata"]) == {"service": "web"}
 
     await database.update_alert_status(event_id, status="resolved", resolved_at=time.time())
     alert = await database.get_alert(event_id)
@@ -58,6 +61,8 @@ async def test_alert_database_crud_operations(tmp_path: Path) -> None:
     deleted = await database.delete_old_alerts(days=30)
     assert deleted == 1
 
+    await database.close()
+
 
 @pytest.mark.asyncio
 async def test_alert_database_statistics(tmp_path: Path) -> None:
@@ -86,3 +91,184 @@ async def test_alert_database_statistics(tmp_path: Path) -> None:
     assert summary["active_alerts"] == 1
     assert summary["resolved_alerts"] == 1
     assert summary["severity_distribution"][4] == 1
+
+    # Other statuses count towards the total only.
+    await database.save_alert("evt-active-2", message_id=3, status="problem", severity=4)
+    await database.save_alert("evt-active-3", message_id=4, status="problem", severity=5)
+    await database.save_alert("evt-acked", message_id=5, status="acknowledged", severity=4)
+
+    summary = await database.get_stats_summary()
+    assert summary == {
+        "total_alerts": 5,
+        "active_alerts": 3,
+        "resolved_alerts": 1,
+        "severity_distribution": {4: 2, 5: 1},
+    }
+
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_alert_database_reuses_connection(tmp_path: Path) -> None:
+    """The database keeps one connection open until close()."""
+    database = AlertDatabase(str(tmp_path / "alerts.db"))
+    await database.initialize()
+
+    async with database.get_connection() as first:
+        pass
+    await database.save_alert("evt-1", message_id=1, status="problem")
+    async with database.get_connection() as second:
+        pass
+    assert first is second
+
+    # A failed operation is rolled back without dropping the connection.
+    with pytest.raises(RuntimeError, match="boom"):
+        async with database.get_connection() as conn:
+            await conn.execute("UPDATE alerts SET status = 'resolved'")
+            raise RuntimeError("boom")
+    alert = await database.get_alert("evt-1")
+    assert alert is not None
+    assert alert["status"] == "problem"
+
+    await database.close()
+    await database.close()  # idempotent
+
+    # The connection is reopened lazily after close().
+    assert await database.get_alert("evt-1") is not None
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_alert_database_uses_wal(tmp_path: Path) -> None:
+    """The connection is configured for write-ahead logging."""
+    database = AlertDatabase(str(tmp_path / "alerts.db"))
+    await database.initialize()
+
+    async with database.get_connection() as conn:
+        async with conn.execute("PRAGMA journal_mode") as cursor:
+            assert (await cursor.fetchone())[0] == "wal"
+
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_alert_database_buffers_events(tmp_path: Path, monkeypatch) -> None:
+    """Audit events are written in batches."""
+    import database as database_module
+
+    monkeypatch.setattr(database_module, "EVENT_BUFFER_SIZE", 3)
+    monkeypatch.setattr(database_module, "EVENT_FLUSH_INTERVAL", 0.01)
+
+    database = AlertDatabase(str(tmp_path / "alerts.db"))
+    await database.initialize()
+
+    async def stored_events() -> int:
+        async with database.get_connection() as conn:
+            async with conn.execute("SELECT COUNT(*) FROM events") as cursor:
+                return int((await cursor.fetchone())[0])
+
+    await database.log_event("alert_sent", event_id="evt-1")
+    await database.log_event("alert_sent", event_id="evt-2")
+    assert await stored_events() == 0
+
+    # Full buffer is flushed immediately.
+    await database.log_event("alert_sent", event_id="evt-3")
+    assert await stored_events() == 3
+
+    # A partial buffer is flushed after the interval.
+    await database.log_event("alert_resolved", event_id="evt-1")
+    await asyncio.sleep(0.05)
+    assert await stored_events() == 4
+
+    # close() writes whatever is still buffered.
+    await database.log_event("alert_deleted", event_id="evt-1")
+    await database.close()
+    assert await stored_events() == 5
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_alert_database_status_queries_use_indexes(tmp_path: Path) -> None:
+    """Status listing and severity grouping are served by composite indexes."""
+    database = AlertDatabase(str(tmp_path / "alerts.db"))
+    await database.initialize()
+
+    async def query_plan(sql: str) -> str:
+        async with database.get_connection() as conn:
+            async with conn.execute(f"EXPLAIN QUERY PLAN {sql}") as cursor:
+                return " ".join(row[3] for row in await cursor.fetchall())
+
+    plan = await query_plan(
+        "SELECT * FROM alerts WHERE status = 'problem' ORDER BY created_at DESC"
+    )
+    assert "idx_alerts_status_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = await query_plan(
+        "SELECT severity, COUNT(*) FROM alerts WHERE status = 'problem' GROUP BY severity"
+    )
+    assert "COVERING INDEX idx_alerts_status_severity" in plan
+
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_alert_database_bulk_writes(tmp_path: Path) -> None:
+    """Bulk helpers store all rows in one call."""
+    database = AlertDatabase(str(tmp_path / "alerts.db"))
+    await database.initialize()
+
+    await database.save_statistics_bulk([("alerts_sent", 3), ("alerts_sent", 4), ("errors", 1)])
+    await database.save_statistics_bulk([])
+    stats = await database.get_statistics("alerts_sent", days=1)
+    assert stats[0]["total"] == 7
+
+    await database.log_event("alert_sent", event_id="evt-1")
+    await database.log_events_bulk(
+        [("alert_resolved", "evt-1", None), ("alert_deleted", "evt-1", "cleanup")]
+    )
+    async with database.get_connection() as conn:
+        async with conn.execute("SELECT COUNT(*) FROM events") as cursor:
+            assert (await cursor.fetchone())[0] == 3
+
+    await database.close()
+
+
+def test_today_is_cached_until_midnight(monkeypatch) -> None:
+    """The statistics date string is recomputed only when the day changes."""
+    from datetime import datetime
+
+    import database as database_module
+
+    monkeypatch.setattr(database_module, "_today_cache", ("", 0.0))
+    evening = datetime(2024, 3, 1, 23, 59, 0).timestamp()
+    monkeypatch.setattr(database_module.time, "time", lambda: evening)
+    assert database_module._today() == "2024-03-01"
+
+    # Within the same day the cached value is returned as is.
+    monkeypatch.setattr(database_module, "_today_cache", ("cached", evening + 60))
+    assert database_module._today() == "cached"
+
+    monkeypatch.setattr(database_module.time, "time", lambda: evening + 60)
+    assert database_module._today() == "2024-03-02"
+
+
+def test_data_directory_created_once(tmp_path: Path, monkeypatch) -> None:
+    """The data directory is created on first use only."""
+    import database as database_module
+
+    calls = []
+    real_makedirs = database_module.os.makedirs
+
+    def makedirs(path, exist_ok=False):
+        calls.append(path)
+        real_makedirs(path, exist_ok=exist_ok)
+
+    monkeypatch.setattr(database_module.os, "makedirs", makedirs)
+    data_dir = tmp_path / "data"
+
+    AlertDatabase(str(data_dir / "alerts.db"))
+    AlertDatabase(str(data_dir / "alerts.db"))
+
+    assert calls == [str(data_dir)]
+    assert data_dir.is_dir()
@@ -43,7 +43,7 @@ def test_filters_quiet_hours(monkeypatch) -> None:
         quiet_hours_min_severity=5,
     )
 
-    monkeypatch.setattr(filters, "is_in_quiet_hours", lambda: True)
+    monkeypatch.setattr(AlertFilters, "is_in_quiet_hours", lambda self: True)
     assert filters.should_send_alert(make_problem(severity="4")) is False
     assert filters.should_send_alert(make_problem(severity="5")) is True
 
@@ -62,6 +62,10 @@ def test_filters_host_groups_and_exclusions() -> None:
     assert filters.should_send_alert(matching_host_problem) is True
 
 
+def test_filters_have_no_instance_dict() -> None:
+    assert not hasattr(AlertFilters(), "__dict__")
+
+
 def test_filter_summary_contains_settings() -> None:
     filters = AlertFilters(
         min_severity=3,
@@ -81,3 +85,127 @@ def test_filter_summary_contains_settings() -> None:
         "Тихие часы: 22:00 - 07:00 (мин. серьезность: 4)",
     ]:
         assert expected in summary
+
+
+def test_filter_problems_checks_quiet_hours_once(monkeypatch) -> None:
+    filters = AlertFilters(min_severity=2, quiet_hours_enabled=True, quiet_hours_min_severity=4)
+
+    calls = []
+
+    def in_quiet_hours(self) -> bool:
+        calls.append(True)
+        return True
+
+    monkeypatch.setattr(AlertFilters, "is_in_quiet_hours", in_quiet_hours)
+    problems = [make_problem(severity=severity) for severity in ("2", "3", "4", "5")]
+
+    passed = filters.filter_problems(problems)
+
+    assert [item["problem"]["severity"] for item in passed] == ["4", "5"]
+    assert len(calls) == 1
+    assert filters.should_send_alert(make_problem(severity="3"), min_severity=3) is True
+
+
+def test_create_filters_from_config(app_config) -> None:
+    from types import SimpleNamespace
+
+    from filters import create_filters_from_config
+
+    filters = create_filters_from_config(app_config)
+    assert filters.min_severity == app_config.min_severity
+    assert filters.quiet_hours_min_severity == app_config.quiet_hours_min_severity
+
+    # Missing optional attributes fall back to defaults.
+    filters = create_filters_from_config(SimpleNamespace(min_severity=3))
+    assert filters.min_severity == 3
+    assert filters.host_groups == []
+    assert filters.quiet_hours_enabled is False
+    assert filters.quiet_hours_start.strftime("%H:%M") == "22:00"
+    assert filters.quiet_hours_min_severity == 4
+
+
+def test_is_in_quiet_hours(monkeypatch) -> None:
+    from datetime import datetime
+
+    import filters as filters_module
+
+    current = {"value": datetime(2024, 1, 1, 12, 0)}
+
+    monkeypatch.setattr(filters_module.time, "localtime", lambda: current["value"].timetuple())
+
+    overnight = AlertFilters(
+        quiet_hours_enabled=True, quiet_hours_start="22:00", quiet_hours_end="08:00"
+    )
+    daytime = AlertFilters(
+        quiet_hours_enabled=True, quiet_hours_start="12:00", quiet_hours_end="13:30"
+    )
+
+    for moment, expected_overnight, expected_daytime in [
+        (datetime(2024, 1, 1, 21, 59), False, False),
+        (datetime(2024, 1, 1, 22, 0), True, False),
+        (datetime(2024, 1, 1, 3, 15), True, False),
+        (datetime(2024, 1, 1, 8, 0), True, False),
+        (datetime(2024, 1, 1, 8, 0, 1), False, False),
+        (datetime(2024, 1, 1, 8, 1), False, False),
+        (datetime(2024, 1, 1, 12, 0), False, True),
+        (datetime(2024, 1, 1, 13, 30), False, True),
+        (datetime(2024, 1, 1, 13, 30, 1), False, False),
+        (datetime(2024, 1, 1, 13, 31), False, False),
+    ]:
+        current["value"] = moment
+        assert overnight.is_in_quiet_hours() is expected_overnight, moment
+        assert daytime.is_in_quiet_hours() is expected_daytime, moment
+
+    assert AlertFilters(quiet_hours_enabled=False).is_in_quiet_hours() is False
+
+
+def test_resolved_problem_skips_quiet_hours_lookup(monkeypatch) -> None:
+    filters = AlertFilters(quiet_hours_enabled=True)
+
+    def fail(self) -> bool:
+        raise AssertionError("quiet hours should not be evaluated")
+
+    monkeypatch.setattr(AlertFilters, "is_in_quiet_hours", fail)
+    assert filters.should_send_alert(make_problem(resolved=True)) is False
+
+
+def test_filter_problems_classifies_each_host_once(monkeypatch) -> None:
+    filters = AlertFilters(min_severity=2, host_groups=["Web"], excluded_hosts=["db-1"])
+
+    problems = []
+    for index, (host, group) in enumerate(
+        [("web-1", "Web"), ("web-1", "Web"), ("db-1", "Web"), ("app-1", "App"), ("db-1", "Web")]
+    ):
+        problem = make_problem(severity="4", host_group=group)
+        problem["problem"]["eventid"] = str(index)
+        problem["hosts"][0].update(host=host, hostid=host)
+        problems.append(problem)
+
+    classified = []
+    classify = AlertFilters._classify_host
+
+    def counting_classify(self, host):
+        classified.append(host["hostid"])
+        return classify(self, host)
+
+    monkeypatch.setattr(AlertFilters, "_classify_host", counting_classify)
+
+    passed = filters.filter_problems(problems)
+
+    assert [item["problem"]["eventid"] for item in passed] == ["0", "1"]
+    assert classified == ["web-1", "db-1", "app-1"]
+
+
+def test_parse_time_is_cached_and_tolerates_bad_input() -> None:
+    """Quiet-hours strings are parsed once; invalid values fall back to midnight."""
+    from datetime import time as dt_time
+
+    from filters import _parse_time
+
+    _parse_time.cache_clear()
+    first = AlertFilters(quiet_hours_start="22:30").quiet_hours_start
+    second = AlertFilters(quiet_hours_start="22:30").quiet_hours_start
+
+    assert first == dt_time(22, 30)
+    assert first is second
+    assert _parse_time("not-a-time") == dt_time(0, 0)
@@ -1,13 +1,14 @@
 """Tests for the main application module."""
 
 import logging
+import logging.handlers
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from config import AppConfig, TelegramConfig, ZabbixConfig
-from main import ZabbixTelegramBot, main
+from main import CachedTimeFormatter, ZabbixTelegramBot, main
 
 
 def make_app_config(log_level: str = "INFO") -> AppConfig:
@@ -38,11 +39,54 @@ def test_setup_logging_creates_files(tmp_path: Path, monkeypatch) -> None:
     bot.config = make_app_config(log_level="DEBUG")
 
     monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(logging.root, "handlers", [])
+    monkeypatch.setattr(logging.root, "level", logging.WARNING)
     bot.setup_logging()
 
     log_file = tmp_path / "logs" / "zbxtg.log"
     assert log_file.exists()
 
+    # A second call must not add handlers or start another listener.
+    listener = bot._log_listener
+    bot.setup_logging()
+    assert len(logging.root.handlers) == 1
+    assert bot._log_listener is listener
+
+    assert listener is not None
+    listener.stop()
+
+
+def test_setup_logging_writes_through_queue(tmp_path: Path, monkeypatch) -> None:
+    """Log records are written to the file by the background listener."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(logging.root, "handlers", [])
+    monkeypatch.setattr(logging.root, "level", logging.WARNING)
+
+    bot = ZabbixTelegramBot()
+    bot.config = make_app_config()
+    bot.setup_logging()
+
+    assert bot._log_listener is not None
+    assert [type(handler) for handler in logging.root.handlers] == [logging.handlers.QueueHandler]
+
+    logging.getLogger("zbxtg.test").info("queued message")
+    bot._log_listener.stop()
+
+    log_text = (tmp_path / "logs" / "zbxtg.log").read_text()
+    assert "zbxtg.test - INFO - queued message" in log_text
+
+
+def test_cached_time_formatter_matches_default() -> None:
+    """Cached timestamps match logging.Formatter within and across seconds."""
+    cached = CachedTimeFormatter("%(asctime)s %(message)s")
+    plain = logging.Formatter("%(asctime)s %(message)s")
+
+    for created in (1700000000.125, 1700000000.875, 1700000001.5):
+        record = logging.LogRecord("zbxtg", logging.INFO, __file__, 1, "msg", None, None)
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+        assert cached.format(record) == plain.format(record)
+
 
 def test_setup_logging_without_config() -> None:
     """Test setup_logging raises error when config is not loaded"""
@@ -161,6 +205,18 @@ async def test_shutdown_sequence() -> None:
     bot.telegram_bot.stop.assert_awaited()
 
 
+@pytest.mark.asyncio
+async def test_shutdown_stops_log_listener() -> None:
+    bot = ZabbixTelegramBot()
+    listener = MagicMock()
+    bot._log_listener = listener
+
+    await bot.shutdown()
+
+    listener.stop.assert_called_once()
+    assert bot._log_listener is None
+
+
 @pytest.mark.asyncio
 async def test_shutdown_with_errors() -> None:
     """Test shutdown handles errors gracefully"""
@@ -1,5 +1,6 @@
 """Tests for Prometheus metrics helpers."""
 
+from pathlib import Path
 from typing import Dict
 
 from metrics import (
@@ -43,3 +44,68 @@ def test_metrics_singleton_and_counters() -> None:
     assert active_alerts._value.get() == 5
 
     app_info.info({"version": "test", "app_name": "zbxtg-test"})
+
+
+def test_prebound_metric_children() -> None:
+    from metrics import (
+        SEVERITIES,
+        alerts_sent_by_severity,
+        alerts_sent_total,
+        telegram_messages_sent_by_status,
+        telegram_messages_sent_total,
+        zabbix_request_duration_by_method,
+    )
+
+    assert set(alerts_sent_by_severity) == set(SEVERITIES)
+    assert "problem.get" in zabbix_request_duration_by_method
+    assert alerts_sent_by_severity["4"] is alerts_sent_total.labels(severity="4")
+
+    before = telegram_messages_sent_total.labels(status="error")._value.get()
+    telegram_messages_sent_by_status["error"].inc()
+    assert telegram_messages_sent_total.labels(status="error")._value.get() == before + 1
+
+
+def test_prebound_histogram_observe() -> None:
+    from metrics import zabbix_request_duration_by_method, zabbix_request_duration_seconds
+
+    zabbix_request_duration_by_method["host.get"].observe(0.3)
+
+    samples = {
+        (sample.name, sample.labels.get("le")): sample.value
+        for metric in zabbix_request_duration_seconds.collect()
+        for sample in metric.samples
+        if sample.labels.get("method") == "host.get"
+    }
+    assert samples[("zbxtg_zabbix_request_duration_seconds_count", None)] >= 1
+    assert samples[("zbxtg_zabbix_request_duration_seconds_bucket", "0.5")] >= 1
+
+
+def test_metrics_module_imports_prometheus_lazily() -> None:
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, metrics\n"
+        "assert 'prometheus_client' not in sys.modules\n"
+        "metrics.alerts_sent_total\n"
+        "assert 'prometheus_client' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parent.parent)
+
+
+def test_gauge_delta_helpers() -> None:
+    import metrics
+
+    metrics.active_alerts.set(0)
+    metrics.failed_alerts_queue.set(0)
+
+    metrics.active_alert_added()
+    metrics.active_alert_added()
+    metrics.active_alert_removed()
+    metrics.failed_alert_enqueued()
+
+    assert metrics.active_alerts._value.get() == 1
+    assert metrics.failed_alerts_queue._value.get() == 1
+
+    metrics.failed_alert_dequeued()
+    assert metrics.failed_alerts_queue._value.get() == 0
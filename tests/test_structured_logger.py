@@ -1,33 +1,95 @@
 """Tests for structured logging helpers."""
 
 import logging
+import time
+from logging.handlers import BufferingHandler, MemoryHandler
 from pathlib import Path
 from typing import Any, Dict, cast
 
 import pytest
 
-from structured_logger import StructuredLogger, setup_structured_logging
+import structured_logger
+from structured_logger import (
+    PeriodicMemoryHandler,
+    RecordQueueHandler,
+    StructuredLogger,
+    get_logger,
+    setup_structured_logging,
+)
 
 
 def test_setup_structured_logging_creates_handlers(
-    tmp_path: Path, caplog: pytest.LogCaptureFixture
+    tmp_path: Path, caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch
 ) -> None:
+    monkeypatch.setattr(logging.root, "handlers", [])
     caplog.set_level(logging.DEBUG)
     log_dir = tmp_path / "logs"
     log_file = log_dir / "app.log"
 
-    setup_structured_logging(level="DEBUG", json_output=False, log_file=str(log_file))
+    setup_structured_logging(level="DEBUG", json_output=False, log_file=str(log_file), force=True)
+
+    # The root logger only enqueues; the listener owns console and file output
+    assert [type(handler) for handler in logging.root.handlers] == [RecordQueueHandler]
 
     # Log a message after setup
     test_logger = logging.getLogger("structured.test")
     test_logger.debug("structured message")
 
+    listener = structured_logger._listener
+    assert listener is not None
+    buffered = [handler for handler in listener.handlers if isinstance(handler, MemoryHandler)]
+    assert len(buffered) == 1
+    assert buffered[0].capacity == structured_logger.FILE_BUFFER_CAPACITY
+    assert isinstance(buffered[0], PeriodicMemoryHandler)
+
+    # Stopping the listener flushes the buffered file output
+    structured_logger._stop_listener()
+
     # Verify file was created and contains the message
     assert log_file.exists()
     log_content = log_file.read_text()
     assert "structured message" in log_content
 
 
+def test_periodic_memory_handler_flushes_on_interval() -> None:
+    target = BufferingHandler(capacity=100)
+    handler = PeriodicMemoryHandler(100, target=target, flush_interval=0.01)
+    record = logging.LogRecord("zbxtg.flush", logging.INFO, __file__, 1, "quiet", None, None)
+
+    handler.handle(record)
+    deadline = time.monotonic() + 2
+    while not target.buffer and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert target.buffer == [record]
+    handler.close()
+    assert not handler._flusher.is_alive()
+
+
+def test_setup_structured_logging_json_keeps_exc_info(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import json
+
+    monkeypatch.setattr(logging.root, "handlers", [])
+    log_file = tmp_path / "app.log"
+    setup_structured_logging(json_output=True, log_file=str(log_file), force=True)
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("structured.exc").exception(
+            "failed %s", "badly", extra={"context": {"job": "sync"}}
+        )
+
+    structured_logger._stop_listener()
+
+    entry = json.loads(log_file.read_text().splitlines()[-1])
+    assert entry["message"] == "failed badly"
+    assert "ValueError: boom" in entry["exc_info"]
+    assert entry["context"] == {"job": "sync"}
+
+
 def test_structured_logger_context(caplog: pytest.LogCaptureFixture) -> None:
     caplog.set_level(logging.INFO)
 
@@ -43,3 +105,87 @@ def test_structured_logger_context(caplog: pytest.LogCaptureFixture) -> None:
     logger.info("clean context")
     second_context = cast(Dict[str, Any], getattr(caplog.records[1], "context", {}))
     assert second_context == {}
+
+
+def test_structured_logger_skips_disabled_levels(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Suppressed levels return before the underlying logger is called."""
+    logger = StructuredLogger("zbxtg.test.disabled")
+    logger.logger.setLevel(logging.WARNING)
+    calls = []
+    monkeypatch.setattr(logger.logger, "log", lambda *args, **kwargs: calls.append(args))
+
+    logger.debug("hidden", key="value")
+    logger.info("hidden")
+    logger.warning("shown")
+
+    assert calls == [(logging.WARNING, "shown")]
+    logger.logger.setLevel(logging.NOTSET)
+
+
+def test_structured_logger_has_no_instance_dict() -> None:
+    logger = StructuredLogger("zbxtg.test.slots")
+
+    assert not hasattr(logger, "__dict__")
+    with pytest.raises(AttributeError):
+        logger.extra = {}  # type: ignore[attr-defined]
+
+
+def test_get_logger_returns_shared_instance() -> None:
+    first = get_logger("zbxtg.test.shared")
+
+    assert get_logger("zbxtg.test.shared") is first
+    assert get_logger("zbxtg.test.other") is not first
+    assert first.logger is logging.getLogger("zbxtg.test.shared")
+
+
+def test_setup_structured_logging_is_idempotent(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(logging.root, "handlers", [])
+    setup_structured_logging(log_file=str(tmp_path / "first.log"), force=True)
+    handlers = list(logging.root.handlers)
+
+    setup_structured_logging(log_file=str(tmp_path / "second.log"))
+
+    assert logging.root.handlers == handlers
+    assert not (tmp_path / "second.log").exists()
+
+    structured_logger._stop_listener()
+
+
+def test_custom_json_formatter_fields() -> None:
+    import json
+
+    from structured_logger import CustomJsonFormatter
+
+    record = logging.LogRecord("zbxtg.json", logging.INFO, __file__, 1, "hello", None, None)
+    record.context = {"user": "alice"}
+
+    dated = json.loads(
+        CustomJsonFormatter("%(message)s", datefmt="%Y-%m-%d %H:%M:%S").format(record)
+    )
+    assert dated["timestamp"] == time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created))
+    assert dated["context"] == {"user": "alice"}
+    assert dated["logger"] == "zbxtg.json"
+    assert dated["level"] == "INFO"
+
+    iso = json.loads(CustomJsonFormatter("%(message)s").format(record))
+    assert iso["timestamp"] == time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+
+    plain = logging.LogRecord("zbxtg.json", logging.INFO, __file__, 1, "bye", None, None)
+    assert "context" not in json.loads(CustomJsonFormatter("%(message)s").format(plain))
+
+
+def test_structured_logger_context_not_mutated_after_emit(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level(logging.INFO)
+
+    logger = StructuredLogger("zbxtg.test.shared_context")
+    logger.set_context(user="alice")
+    logger.info("first")
+    logger.set_context(user="bob")
+    logger.info("second")
+
+    contexts = [cast(Dict[str, Any], getattr(record, "context", {})) for record in caplog.records]
+    assert contexts == [{"user": "alice"}, {"user": "bob"}]
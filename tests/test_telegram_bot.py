@@ -1,11 +1,16 @@
 """Tests for telegram_bot module."""
 
-from unittest.mock import MagicMock, patch
+import asyncio
+import time
+import warnings
+from dataclasses import replace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from telegram.error import TelegramError
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+from telegram.warnings import PTBDeprecationWarning
 
-from telegram_bot import TelegramBot
+from telegram_bot import MAX_MESSAGE_LENGTH, RateLimiter, TelegramBot, _split_message
 
 
 class TestTelegramBot:
@@ -73,7 +78,7 @@ class TestTelegramBot:
 
         # First call fails, second succeeds
         mock_telegram_bot.send_message.side_effect = [
-            TelegramError("Network error"),
+            NetworkError("Network error"),
             MagicMock(message_id=1),
         ]
 
@@ -88,7 +93,7 @@ class TestTelegramBot:
         bot = TelegramBot(telegram_config)
         bot.bot = mock_telegram_bot
 
-        mock_telegram_bot.send_message.side_effect = TelegramError("Network error")
+        mock_telegram_bot.send_message.side_effect = NetworkError("Network error")
 
         message_id = await bot.send_message("Test", retry_count=3)
 
@@ -112,12 +117,66 @@ class TestTelegramBot:
         bot = TelegramBot(telegram_config)
         bot.bot = mock_telegram_bot
 
-        mock_telegram_bot.edit_message_text.side_effect = TelegramError("message is not modified")
+        mock_telegram_bot.edit_message_text.side_effect = BadRequest(
+            "Bad Request: message is not modified"
+        )
 
         result = await bot.edit_message(123, "Same text")
 
         assert result is True  # Should return True for "not modified" error
 
+    @pytest.mark.asyncio
+    async def test_edit_message_failure_backoff(self, telegram_config, mock_telegram_bot):
+        """Test edit gives up after retries, sleeping with jittered exponential backoff."""
+        bot = TelegramBot(telegram_config)
+        bot.bot = mock_telegram_bot
+
+        mock_telegram_bot.edit_message_text.side_effect = NetworkError("Network error")
+
+        with patch("telegram_bot.asyncio.sleep") as mock_sleep:
+            result = await bot.edit_message(123, "Text", retry_count=3)
+
+        assert result is False
+        assert mock_telegram_bot.edit_message_text.call_count == 3
+        delays = [call.args[0] for call in mock_sleep.await_args_list]
+        assert len(delays) == 2
+        assert 0 <= delays[0] <= 1
+        assert 0 <= delays[1] <= 2
+
+    @pytest.mark.asyncio
+    async def test_send_message_honors_retry_after(self, telegram_config, mock_telegram_bot):
+        """Test 429 responses are retried after the interval Telegram asks for."""
+        bot = TelegramBot(telegram_config)
+        bot.bot = mock_telegram_bot
+
+        # PTB itself warns about the retry_after type when the error is constructed
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", PTBDeprecationWarning)
+            retry_after = RetryAfter(30)
+        mock_telegram_bot.send_message.side_effect = [retry_after, MagicMock(message_id=7)]
+
+        with patch("telegram_bot.asyncio.sleep") as mock_sleep:
+            message_id = await bot.send_message("Test")
+
+        assert message_id == 7
+        mock_sleep.assert_awaited_once_with(30.25)
+
+    @pytest.mark.asyncio
+    async def test_send_message_does_not_retry_permanent_errors(
+        self, telegram_config, mock_telegram_bot
+    ):
+        """Test errors a retry cannot fix are not retried."""
+        bot = TelegramBot(telegram_config)
+        bot.bot = mock_telegram_bot
+
+        mock_telegram_bot.send_message.side_effect = BadRequest("Chat not found")
+        assert await bot.send_message("Test") is None
+        assert mock_telegram_bot.send_message.call_count == 1
+
+        mock_telegram_bot.send_message.side_effect = Forbidden("Bot was blocked by the user")
+        assert await bot.send_message("Test") is None
+        assert mock_telegram_bot.send_message.call_count == 2
+
     @pytest.mark.asyncio
     async def test_delete_message_success(self, telegram_config, mock_telegram_bot):
         """Test deleting message successfully."""
@@ -135,7 +194,9 @@ class TestTelegramBot:
         bot = TelegramBot(telegram_config)
         bot.bot = mock_telegram_bot
 
-        mock_telegram_bot.delete_message.side_effect = TelegramError("message to delete not found")
+        mock_telegram_bot.delete_message.side_effect = BadRequest(
+            "Bad Request: message to delete not found"
+        )
 
         result = await bot.delete_message(123)
 
@@ -152,6 +213,22 @@ class TestTelegramBot:
         assert message_id == 1
         mock_telegram_bot.send_message.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_test_command_uses_wall_clock(self, telegram_config, monkeypatch):
+        """Test that /test sends an alert stamped with the current Unix time."""
+        bot = TelegramBot(telegram_config)
+        send_alert = AsyncMock(return_value=1)
+        monkeypatch.setattr(bot, "send_alert", send_alert)
+        update = MagicMock()
+        update.message.reply_text = AsyncMock()
+
+        before = int(time.time())
+        await bot._test_command(update, MagicMock())
+
+        alert = send_alert.call_args.args[0]
+        assert before <= int(alert["problem"]["clock"]) <= int(time.time())
+        update.message.reply_text.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_update_alert(self, telegram_config, mock_telegram_bot, mock_problem_details):
         """Test updating alert message."""
@@ -163,6 +240,27 @@ class TestTelegramBot:
         assert result is True
         mock_telegram_bot.edit_message_text.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_update_alert_skips_unchanged_content(
+        self, telegram_config, mock_telegram_bot, mock_problem_details
+    ):
+        """Test unchanged alerts are not re-sent to Telegram."""
+        bot = TelegramBot(telegram_config)
+        bot.bot = mock_telegram_bot
+
+        assert await bot.update_alert(123, mock_problem_details) is True
+        assert await bot.update_alert(123, mock_problem_details) is True
+        assert mock_telegram_bot.edit_message_text.call_count == 1
+
+        # A changed message is edited again
+        mock_problem_details["problem"]["acknowledged"] = "1"
+        assert await bot.update_alert(123, mock_problem_details) is True
+        assert mock_telegram_bot.edit_message_text.call_count == 2
+
+        # Deleting forgets the cached content
+        await bot.delete_message(123)
+        assert 123 not in bot._content_hashes
+
     def test_format_alert_message(self, telegram_config, mock_problem_details):
         """Test alert message formatting."""
         bot = TelegramBot(telegram_config)
@@ -175,6 +273,21 @@ class TestTelegramBot:
         assert "web-server-01" in message
         assert "192.168.1.100" in message
         assert markup is not None
+        assert markup.inline_keyboard[0][0].url == (
+            "https://zabbix.example.com/zabbix.php?action=problem.view&filter_eventids[]="
+            f"{mock_problem_details['problem']['eventid']}"
+        )
+
+        # Re-rendering the same event reuses the cached keyboard
+        _, second_markup = bot._format_alert_message(
+            mock_problem_details, "https://zabbix.example.com/"
+        )
+        assert second_markup is not markup
+        _, third_markup = bot._format_alert_message(
+            mock_problem_details, "https://zabbix.example.com"
+        )
+        assert third_markup is markup
+        assert bot._format_alert_message(mock_problem_details)[1] is None
 
     def test_format_alert_message_resolved(self, telegram_config, mock_problem_details):
         """Test formatting resolved alert."""
@@ -230,11 +343,72 @@ class TestTelegramBot:
 
         with patch("telegram_bot.Application.builder") as mock_builder:
             mock_app = MagicMock()
-            mock_builder.return_value.token.return_value.build.return_value = mock_app
+            mock_builder.return_value.bot.return_value.build.return_value = mock_app
 
             await bot.initialize()
 
-            assert bot.application is not None
+            assert bot.application is mock_app
+
+        # The application reuses bot.bot and therefore its connection pools
+        mock_builder.return_value.bot.assert_called_once_with(bot.bot)
+
+        handlers = [call.args[0] for call in mock_app.add_handler.call_args_list]
+        commands = {
+            next(iter(handler.commands)): handler.filters
+            for handler in handlers
+            if hasattr(handler, "commands")
+        }
+        assert set(commands) == {"start", "help", "status", "problems", "test"}
+        assert commands["help"] is bot._auth_filter
+        assert commands["start"] is not bot._auth_filter
+        assert all(not handler.block for handler in handlers if hasattr(handler, "commands"))
+        assert len(handlers) == 6
+
+    @pytest.mark.asyncio
+    async def test_stop_closes_shared_request(self, telegram_config, mock_telegram_application):
+        """Test stop shuts down the application and the shared connection pool."""
+        bot = TelegramBot(telegram_config)
+        bot.application = mock_telegram_application
+
+        with patch.object(bot._request, "shutdown", AsyncMock()) as mock_shutdown:
+            await bot.stop()
+
+        mock_telegram_application.shutdown.assert_awaited_once()
+        mock_shutdown.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_start_long_polling(self, telegram_config, mock_telegram_application):
+        """Test start uses long polling when no webhook is configured."""
+        bot = TelegramBot(telegram_config)
+        bot.application = mock_telegram_application
+
+        await bot.start()
+
+        mock_telegram_application.updater.start_polling.assert_awaited_once_with(
+            timeout=20, allowed_updates=["message"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_start_webhook(self, telegram_config, mock_telegram_application):
+        """Test start registers a webhook when webhook_url is configured."""
+        config = replace(
+            telegram_config, webhook_url="https://bot.example.com/", webhook_secret_token="s3cret"
+        )
+        bot = TelegramBot(config)
+        bot.application = mock_telegram_application
+        mock_telegram_application.updater.start_webhook = AsyncMock()
+
+        await bot.start()
+
+        mock_telegram_application.updater.start_polling.assert_not_awaited()
+        mock_telegram_application.updater.start_webhook.assert_awaited_once_with(
+            listen="0.0.0.0",
+            port=8443,
+            url_path=config.bot_token,
+            webhook_url=f"https://bot.example.com/{config.bot_token}",
+            secret_token="s3cret",
+            allowed_updates=["message"],
+        )
 
     @pytest.mark.asyncio
     async def test_initialize_failure(self, telegram_config):
@@ -248,8 +422,90 @@ class TestTelegramBot:
                 await bot.initialize()
 
     def test_authorized_user_filter(self, telegram_config):
-        """Test authorized user filter creation."""
+        """Test authorized user filters are created once per bot."""
         bot = TelegramBot(telegram_config)
-        user_filter = bot._authorized_user_filter()
 
-        assert user_filter is not None
+        assert bot._auth_filter.user_ids == frozenset({telegram_config.target_chat_id})
+        assert bot._auth_text_filter is not None
+
+
+def test_format_alert_message_tags(telegram_config):
+    """Test tags render as key:value, key only, and skip empty keys."""
+    bot = TelegramBot(telegram_config)
+    alert = {
+        "problem": {
+            "eventid": "1",
+            "tags": [
+                {"tag": "service", "value": "web"},
+                {"tag": "critical", "value": ""},
+                {"tag": "", "value": "orphan"},
+                {"value": "missing"},
+            ],
+        }
+    }
+
+    message, _ = bot._format_alert_message(alert)
+
+    assert "<b>Теги:</b> service:web, critical" in message.splitlines()
+
+
+def test_format_timestamp_is_cached():
+    """Test repeated timestamps are formatted once."""
+    from telegram_bot import _format_timestamp
+
+    _format_timestamp.cache_clear()
+    first = _format_timestamp(1700000000)
+
+    assert _format_timestamp(1700000000) == first
+    assert _format_timestamp.cache_info().hits == 1
+    assert first == time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(1700000000))
+
+
+def test_split_message():
+    """Test long messages split on newlines without leading whitespace."""
+    line = "x" * 1000
+    message = "\n".join([line] * 10)
+
+    parts = _split_message(message)
+
+    assert all(len(part) <= MAX_MESSAGE_LENGTH for part in parts)
+    assert "\n".join(parts) == message
+    assert not any(part.startswith("\n") for part in parts)
+
+    # No newline within the limit: hard split at MAX_MESSAGE_LENGTH
+    unbroken = "y" * (MAX_MESSAGE_LENGTH + 10)
+    assert _split_message(unbroken) == ["y" * MAX_MESSAGE_LENGTH, "y" * 10]
+    assert _split_message("short") == ["short"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_calls_after_burst():
+    """Test the limiter lets a burst through and then waits for new tokens."""
+    limiter = RateLimiter(rate=20, burst=2)
+    loop = asyncio.get_running_loop()
+
+    started = loop.time()
+    await limiter.acquire()
+    await limiter.acquire()
+    burst_elapsed = loop.time() - started
+
+    await limiter.acquire()
+    await limiter.acquire()
+    total_elapsed = loop.time() - started
+
+    assert burst_elapsed < 0.05
+    assert total_elapsed >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_send_message_waits_for_rate_limit(telegram_config, mock_telegram_bot):
+    """Test every Telegram call passes the per-chat limiter."""
+    bot = TelegramBot(telegram_config)
+    bot.bot = mock_telegram_bot
+
+    with patch.object(bot, "_throttle", AsyncMock()) as mock_throttle:
+        await bot.send_message("A" * 5000)
+        await bot.delete_message(1)
+
+    assert mock_throttle.await_count == mock_telegram_bot.send_message.call_count + 1
+    mock_throttle.assert_awaited_with(telegram_config.target_chat_id)
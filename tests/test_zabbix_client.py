@@ -1,6 +1,11 @@
 """Tests for zabbix_client module."""
 
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import pairwise
 from unittest.mock import Mock, patch
 
 import pytest
@@ -28,7 +33,7 @@ class TestZabbixClient:
 
     def test_create_session_with_ssl_verify(self, zabbix_config):
         """Test session creation with SSL verification enabled."""
-        zabbix_config.ssl_verify = True
+        zabbix_config = replace(zabbix_config, ssl_verify=True)
         client = ZabbixClient(zabbix_config)
         assert client.session.verify == "/etc/ssl/certs/ca-certificates.crt"
 
@@ -36,7 +41,7 @@ class TestZabbixClient:
     def test_make_request_success(self, mock_post, zabbix_config, mock_zabbix_response):
         """Test successful API request."""
         mock_response = Mock()
-        mock_response.json.return_value = mock_zabbix_response
+        mock_response.content = json.dumps(mock_zabbix_response).encode()
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -46,15 +51,41 @@ class TestZabbixClient:
         assert result == mock_zabbix_response["result"]
         mock_post.assert_called_once()
 
+    @patch("zabbix_client.requests.Session.post")
+    def test_make_request_concurrent_callers(self, mock_post, zabbix_config, mock_zabbix_response):
+        """Test concurrent requests keep the rate limit and get unique ids."""
+        sent = []
+        sent_lock = threading.Lock()
+        content = json.dumps(mock_zabbix_response).encode()
+
+        def post(url, json, timeout):
+            with sent_lock:
+                sent.append((time.monotonic(), json["id"]))
+            return Mock(content=content, raise_for_status=Mock())
+
+        mock_post.side_effect = post
+        client = ZabbixClient(zabbix_config)
+        client.min_request_interval = 0.05
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: client._make_request("test.method"), range(8)))
+
+        send_times = sorted(moment for moment, _ in sent)
+        assert all(b - a >= 0.045 for a, b in pairwise(send_times))
+        assert sorted(request_id for _, request_id in sent) == list(range(1, 9))
+        assert client.request_id == 9
+
     @patch("zabbix_client.requests.Session.post")
     def test_make_request_api_error(self, mock_post, zabbix_config):
         """Test API request with error response."""
         mock_response = Mock()
-        mock_response.json.return_value = {
-            "jsonrpc": "2.0",
-            "error": {"code": -32602, "message": "Invalid params"},
-            "id": 1,
-        }
+        mock_response.content = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "error": {"code": -32602, "message": "Invalid params"},
+                "id": 1,
+            }
+        ).encode()
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -75,7 +106,7 @@ class TestZabbixClient:
     def test_make_request_json_decode_error(self, mock_post, zabbix_config):
         """Test API request with invalid JSON response."""
         mock_response = Mock()
-        mock_response.json.side_effect = json.JSONDecodeError("Invalid JSON", "", 0)
+        mock_response.content = b"<html>Invalid JSON</html>"
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -95,16 +126,18 @@ class TestZabbixClient:
     @patch("zabbix_client.requests.Session.post")
     def test_authenticate_with_username_password(self, mock_post, zabbix_config):
         """Test authentication with username/password."""
-        zabbix_config.api_token = None
-        zabbix_config.username = "admin"
-        zabbix_config.password = "password"
+        zabbix_config = replace(
+            zabbix_config, api_token=None, username="admin", password="password"
+        )
 
         mock_response = Mock()
-        mock_response.json.return_value = {
-            "jsonrpc": "2.0",
-            "result": "auth_token_123",
-            "id": 1,
-        }
+        mock_response.content = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": "auth_token_123",
+                "id": 1,
+            }
+        ).encode()
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -117,16 +150,18 @@ class TestZabbixClient:
     @patch("zabbix_client.requests.Session.post")
     def test_authenticate_failure(self, mock_post, zabbix_config):
         """Test authentication failure."""
-        zabbix_config.api_token = None
-        zabbix_config.username = "admin"
-        zabbix_config.password = "wrong_password"
+        zabbix_config = replace(
+            zabbix_config, api_token=None, username="admin", password="wrong_password"
+        )
 
         mock_response = Mock()
-        mock_response.json.return_value = {
-            "jsonrpc": "2.0",
-            "error": {"code": -32500, "message": "Invalid credentials"},
-            "id": 1,
-        }
+        mock_response.content = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "error": {"code": -32500, "message": "Invalid credentials"},
+                "id": 1,
+            }
+        ).encode()
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -139,7 +174,7 @@ class TestZabbixClient:
     def test_get_problems(self, mock_post, zabbix_config, mock_zabbix_response):
         """Test getting problems from Zabbix."""
         mock_response = Mock()
-        mock_response.json.return_value = mock_zabbix_response
+        mock_response.content = json.dumps(mock_zabbix_response).encode()
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -149,6 +184,20 @@ class TestZabbixClient:
         assert len(problems) == 1
         assert problems[0]["eventid"] == "12345"
         assert problems[0]["name"] == "Test problem"
+        assert "time_from" not in mock_post.call_args.kwargs["json"]["params"]
+
+    @patch("zabbix_client.requests.Session.post")
+    def test_get_problems_time_from(self, mock_post, zabbix_config, mock_zabbix_response):
+        """Test that time_from is passed to problem.get."""
+        mock_response = Mock()
+        mock_response.content = json.dumps(mock_zabbix_response).encode()
+        mock_response.raise_for_status = Mock()
+        mock_post.return_value = mock_response
+
+        client = ZabbixClient(zabbix_config)
+        client.get_problems(limit=10, time_from=1234567890)
+
+        assert mock_post.call_args.kwargs["json"]["params"]["time_from"] == 1234567890
 
     @patch("zabbix_client.requests.Session.post")
     def test_get_problems_error(self, mock_post, zabbix_config):
@@ -164,17 +213,19 @@ class TestZabbixClient:
     def test_get_triggers(self, mock_post, zabbix_config):
         """Test getting triggers from Zabbix."""
         mock_response = Mock()
-        mock_response.json.return_value = {
-            "jsonrpc": "2.0",
-            "result": [
-                {
-                    "triggerid": "54321",
-                    "description": "High CPU usage",
-                    "hosts": [{"hostid": "10001", "name": "web-server-01"}],
-                }
-            ],
-            "id": 1,
-        }
+        mock_response.content = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": [
+                    {
+                        "triggerid": "54321",
+                        "description": "High CPU usage",
+                        "hosts": [{"hostid": "10001", "name": "web-server-01"}],
+                    }
+                ],
+                "id": 1,
+            }
+        ).encode()
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -188,17 +239,19 @@ class TestZabbixClient:
     def test_get_hosts(self, mock_post, zabbix_config):
         """Test getting hosts from Zabbix."""
         mock_response = Mock()
-        mock_response.json.return_value = {
-            "jsonrpc": "2.0",
-            "result": [
-                {
-                    "hostid": "10001",
-                    "name": "web-server-01",
-                    "interfaces": [{"ip": "192.168.1.100"}],
-                }
-            ],
-            "id": 1,
-        }
+        mock_response.content = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": [
+                    {
+                        "hostid": "10001",
+                        "name": "web-server-01",
+                        "interfaces": [{"ip": "192.168.1.100"}],
+                    }
+                ],
+                "id": 1,
+            }
+        ).encode()
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -213,11 +266,13 @@ class TestZabbixClient:
     def test_check_connection_with_api_token(self, mock_post, zabbix_config):
         """Test connection check with API token."""
         mock_response = Mock()
-        mock_response.json.return_value = {
-            "jsonrpc": "2.0",
-            "result": "6.0.0",
-            "id": 1,
-        }
+        mock_response.content = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": "6.0.0",
+                "id": 1,
+            }
+        ).encode()
         mock_response.raise_for_status = Mock()
         mock_post.return_value = mock_response
 
@@ -258,3 +313,32 @@ class TestZabbixClient:
         assert "hosts" in details
         assert details["trigger"]["triggerid"] == "54321"
         assert details["hosts"][0]["hostid"] == "10001"
+
+    @patch.object(ZabbixClient, "get_triggers")
+    @patch.object(ZabbixClient, "get_hosts")
+    def test_get_problem_details_batch(self, mock_get_hosts, mock_get_triggers, zabbix_config):
+        """Test getting details for several problems with shared API calls."""
+        mock_get_triggers.return_value = [
+            {"triggerid": "1", "hosts": [{"hostid": "10001"}]},
+            {"triggerid": "2", "hosts": [{"hostid": "10002"}]},
+        ]
+        mock_get_hosts.return_value = [
+            {"hostid": "10001", "name": "web-01"},
+            {"hostid": "10002", "name": "db-01"},
+        ]
+
+        client = ZabbixClient(zabbix_config)
+        problems = [
+            {"eventid": "100", "objectid": "2"},
+            {"eventid": "101", "objectid": "1"},
+            {"eventid": "102", "objectid": "2"},
+            {"eventid": "103"},
+        ]
+        details = client.get_problem_details_batch(problems)
+
+        mock_get_triggers.assert_called_once_with(["2", "1"])
+        mock_get_hosts.assert_called_once_with(["10001", "10002"])
+        assert [d["problem"]["eventid"] for d in details] == ["100", "101", "102", "103"]
+        assert details[0]["hosts"][0]["name"] == "db-01"
+        assert details[1]["hosts"][0]["name"] == "web-01"
+        assert details[3] == {"problem": problems[3], "trigger": {}, "hosts": []}
@@ -1,8 +1,10 @@
 import json
 import logging
+import threading
 import time
 from typing import Any, Dict, List, Optional, Sequence
 
+import orjson
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -32,6 +34,10 @@ class ZabbixClient:
         self.last_request_time: float = 0.0
         self.min_request_interval = 0.1  # Минимум 100ms между запросами
 
+        # Клиент вызывается из нескольких потоков пула AlertMonitor: интервал
+        # между запросами и номер JSON-RPC запроса выдаются под блокировкой
+        self._request_lock = threading.Lock()
+
     def _create_session(self) -> requests.Session:
         """Создает HTTP сессию с retry-стратегией"""
         session = requests.Session()
@@ -59,13 +65,17 @@ class ZabbixClient:
         self, method: str, params: Optional[Dict[str, Any]] = None, skip_auth: bool = False
     ) -> Any:
         """Выполняет запрос к Zabbix API"""
-        # Rate limiting
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last_request
-            logger.debug(f"Rate limiting: sleeping {sleep_time:.3f}s")
-            time.sleep(sleep_time)
+        # Rate limiting: потоки получают слоты для отправки по очереди, не реже
+        # min_request_interval; сам HTTP-запрос выполняется уже без блокировки
+        with self._request_lock:
+            time_since_last_request = time.monotonic() - self.last_request_time
+            if time_since_last_request < self.min_request_interval:
+                sleep_time = self.min_request_interval - time_since_last_request
+                logger.debug("Rate limiting: sleeping %.3fs", sleep_time)
+                time.sleep(sleep_time)
+            self.last_request_time = time.monotonic()
+            request_id = self.request_id
+            self.request_id += 1
 
         url = f"{self.config.url.rstrip('/')}/api_jsonrpc.php"
 
@@ -73,7 +83,7 @@ class ZabbixClient:
             "jsonrpc": "2.0",
             "method": method,
             "params": params or {},
-            "id": self.request_id,
+            "id": request_id,
         }
 
         # Используем API токен или auth токен (если не пропускаем auth)
@@ -83,29 +93,27 @@ class ZabbixClient:
             elif self.auth_token and method != "user.login":
                 payload["auth"] = self.auth_token
 
-        self.request_id += 1
-        logger.debug(f"Zabbix API request: {method}")
+        logger.debug("Zabbix API request: %s", method)
 
         try:
             response = self.session.post(url, json=payload, timeout=self.timeout)
-            self.last_request_time = time.time()
             response.raise_for_status()
 
-            result = response.json()
+            result = orjson.loads(response.content)
 
             if "error" in result:
                 error_msg = result["error"]
-                logger.error(f"Zabbix API error for {method}: {error_msg}")
+                logger.error("Zabbix API error for %s: %s", method, error_msg)
                 raise ZabbixAPIError(f"Zabbix API error: {error_msg}")
 
-            logger.debug(f"Zabbix API response for {method}: success")
+            logger.debug("Zabbix API response for %s: success", method)
             return result.get("result", {})
 
         except requests.RequestException as e:
-            logger.error(f"HTTP error during Zabbix API request: {e}")
+            logger.error("HTTP error during Zabbix API request: %s", e)
             raise ZabbixAPIError(f"HTTP error: {e}") from e
         except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
+            logger.error("JSON decode error: %s", e)
             raise ZabbixAPIError(f"Invalid JSON response: {e}") from e
 
     def authenticate(self) -> bool:
@@ -135,15 +143,18 @@ class ZabbixClient:
             return True
 
         except ZabbixAPIError as e:
-            logger.error(f"Аутентификация не удалась: {e}")
+            logger.error("Аутентификация не удалась: %s", e)
             return False
 
-    def get_problems(self, limit: int = 100, only_active: bool = True) -> List[Dict[str, Any]]:
+    def get_problems(
+        self, limit: int = 100, only_active: bool = True, time_from: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """Получает список активных проблем
 
         Args:
             limit: Максимальное количество проблем
             only_active: Если True, возвращает только нерешенные проблемы
+            time_from: Если указан, возвращает только проблемы, созданные не раньше этого времени
         """
         try:
             params = {
@@ -163,6 +174,10 @@ class ZabbixClient:
             else:
                 params["recent"] = True  # Все недавние проблемы
 
+            # Фильтрация по времени на стороне Zabbix
+            if time_from is not None:
+                params["time_from"] = time_from
+
             problems = self._make_request("problem.get", params)
             if isinstance(problems, list):
                 return [item for item in problems if isinstance(item, dict)]
@@ -171,7 +186,7 @@ class ZabbixClient:
             return []
 
         except ZabbixAPIError as e:
-            logger.error(f"Не удалось получить проблемы: {e}")
+            logger.error("Не удалось получить проблемы: %s", e)
             return []
 
     def get_triggers(self, trigger_ids: Sequence[str]) -> List[Dict[str, Any]]:
@@ -200,7 +215,7 @@ class ZabbixClient:
             return []
 
         except ZabbixAPIError as e:
-            logger.error(f"Не удалось получить триггеры: {e}")
+            logger.error("Не удалось получить триггеры: %s", e)
             return []
 
     def get_hosts(self, host_ids: Sequence[str]) -> List[Dict[str, Any]]:
@@ -226,7 +241,7 @@ class ZabbixClient:
             return []
 
         except ZabbixAPIError as e:
-            logger.error(f"Не удалось получить хосты: {e}")
+            logger.error("Не удалось получить хосты: %s", e)
             return []
 
     def get_events(self, event_ids: Sequence[str]) -> List[Dict[str, Any]]:
@@ -252,7 +267,7 @@ class ZabbixClient:
             return []
 
         except ZabbixAPIError as e:
-            logger.error(f"Не удалось получить события: {e}")
+            logger.error("Не удалось получить события: %s", e)
             return []
 
     def check_connection(self) -> bool:
@@ -297,5 +312,47 @@ class ZabbixClient:
             return {"problem": problem, "trigger": trigger, "hosts": hosts}
 
         except Exception as e:
-            logger.error(f"Не удалось получить детали проблемы: {e}")
+            logger.error("Не удалось получить детали проблемы: %s", e)
             return {"problem": problem, "trigger": {}, "hosts": []}
+
+    def get_problem_details_batch(self, problems: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Получает детальную информацию о нескольких проблемах
+
+        Триггеры и хосты всех проблем запрашиваются одним trigger.get и одним
+        host.get вместо пары запросов на каждую проблему.
+        """
+        try:
+            trigger_ids = list(
+                dict.fromkeys(
+                    problem["objectid"]
+                    for problem in problems
+                    if isinstance(problem.get("objectid"), str)
+                )
+            )
+            triggers = {
+                trigger.get("triggerid"): trigger for trigger in self.get_triggers(trigger_ids)
+            }
+
+            host_ids = list(
+                dict.fromkeys(
+                    host["hostid"]
+                    for trigger in triggers.values()
+                    for host in trigger.get("hosts", [])
+                )
+            )
+            hosts = {host.get("hostid"): host for host in self.get_hosts(host_ids)}
+
+            details = []
+            for problem in problems:
+                trigger = triggers.get(problem.get("objectid"), {})
+                trigger_hosts = [
+                    hosts[host["hostid"]]
+                    for host in trigger.get("hosts", [])
+                    if host.get("hostid") in hosts
+                ]
+                details.append({"problem": problem, "trigger": trigger, "hosts": trigger_hosts})
+            return details
+
+        except Exception as e:
+            logger.error("Не удалось получить детали проблем: %s", e)
+            return [{"problem": problem, "trigger": {}, "hosts": []} for problem in problems]